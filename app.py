@@ -9,7 +9,6 @@ import pandas as pd
 from datetime import datetime, timedelta
 from cached_api_client import CachedBaseAPIClient
 from config import get_api_key
-import json
 
 # CPV Codes Dictionary - Portuguese Healthcare and Laboratory Focus
 CPV_CODES = {
@@ -56,8 +55,9 @@ CPV_CODES = {
     "90524000-6": "SERVIÇOS DE GESTÃO DE RESÍDUOS MÉDICOS",
 }
 
+@st.cache_resource
 def get_cpv_display_options():
-    """Get CPV codes formatted for display in multiselect."""
+    """Get CPV codes formatted for display in multiselect (built once per session)."""
     return [f"{code} - {desc}" for code, desc in sorted(CPV_CODES.items())]
 
 def extract_cpv_codes_from_selection(selected_options):
@@ -275,7 +275,6 @@ def announcements_to_dataframe(announcements):
         docs_url = announcement.get('PecasProcedimento', '')
         
         # Calculate deadline date
-        from datetime import datetime, timedelta
         deadline_days = announcement.get('PrazoPropostas', 0)
         pub_date_str = announcement.get('dataPublicacao', '')
         deadline_str = 'N/A'
@@ -5,6 +5,8 @@ A Python client for interacting with the Portuguese public procurement API.
 Provides access to contracts, announcements, modifications, and entity data.
 """
 
+import json
+import zlib
 import requests
 from typing import Optional, Dict, Any, List
 from urllib.parse import urlencode
@@ -32,35 +34,65 @@ class BaseAPIClient:
         self.session.headers.update({
             "_AcessToken": self.access_token
         })
-    
+        # Conditional GET cache: (endpoint, sorted params) ->
+        # (ETag, zlib-compressed raw body). Historical data never changes,
+        # so a 304 lets us skip the full payload download. Bodies are kept
+        # compressed (JSON text shrinks ~10x) and the cache is capped, so
+        # whole-year dumps don't accumulate as parsed objects pinned in RAM
+        # for the life of the process; a 304 hit pays one decompress+parse.
+        self._etag_cache: Dict[tuple, tuple] = {}
+
+    # Oldest entries are evicted beyond this; the client only cycles
+    # through a few distinct (endpoint, params) shapes per process
+    _ETAG_CACHE_MAX_ENTRIES = 8
+
     def _make_request(self, endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
         """
         Make a request to the API.
-        
+
+        Uses conditional GETs (If-None-Match) when the server previously
+        returned an ETag for the same endpoint/params, so unchanged
+        responses cost a 304 instead of a full payload download.
+
         Args:
             endpoint: API endpoint path
             params: Query parameters
-            
+
         Returns:
             JSON response as dictionary
-            
+
         Raises:
             ValueError: If no parameters are provided or response indicates error
             requests.exceptions.RequestException: For network/HTTP errors
         """
         if not params:
             raise ValueError("At least one parameter must be provided")
-        
+
         # Remove None values from params
         clean_params = {k: v for k, v in params.items() if v is not None}
-        
+
         if not clean_params:
             raise ValueError("At least one parameter must be provided")
-        
+
         url = f"{self.BASE_URL}/{endpoint}"
-        
+
+        cache_key = (endpoint, tuple(sorted(clean_params.items())))
+        cached = self._etag_cache.get(cache_key)
+
+        headers = {}
+        if cached:
+            headers["If-None-Match"] = cached[0]
+
         try:
-            response = self.session.get(url, params=clean_params)
+            response = self.session.get(url, params=clean_params, headers=headers)
+
+            # Server confirmed our cached copy is still current
+            if response.status_code == 304 and cached:
+                # Refresh recency so hot keys survive eviction
+                self._etag_cache.pop(cache_key, None)
+                self._etag_cache[cache_key] = cached
+                return json.loads(zlib.decompress(cached[1]))
+
             response.raise_for_status()
             
             # Check for API-specific errors in response
@@ -76,9 +108,18 @@ class BaseAPIClient:
                     raise ValueError("Invalid access token")
                 else:
                     raise ValueError(f"API Error: {data}")
-            
+
+            # Remember the ETag so the next identical request can be
+            # conditional, evicting the least recently used entry when full
+            etag = response.headers.get("ETag")
+            if etag:
+                self._etag_cache.pop(cache_key, None)
+                while len(self._etag_cache) >= self._ETAG_CACHE_MAX_ENTRIES:
+                    del self._etag_cache[next(iter(self._etag_cache))]
+                self._etag_cache[cache_key] = (etag, zlib.compress(response.content))
+
             return data
-            
+
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 500:
                 raise Exception("Internal server error") from e
@@ -5,12 +5,145 @@ This client caches API results locally to avoid repeatedly fetching
 all contracts from the API. It intelligently updates only new data.
 """
 
+import hashlib
 import sqlite3
 import json
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import Iterator, List, Dict, Any, Optional, Tuple
 from base_api_client import BaseAPIClient
 
+# orjson parses roughly 3-6x faster than the stdlib; fall back silently so
+# the cache keeps working in environments without it
+try:
+    import orjson
+    _json_loads = orjson.loads
+
+    def _json_dumps(obj: Any) -> str:
+        # orjson emits bytes; decode so raw_data keeps TEXT affinity and
+        # _content_hash sees the same str it always has
+        return orjson.dumps(obj).decode('utf-8')
+except ImportError:
+    _json_loads = json.loads
+    _json_dumps = json.dumps
+
+
+# API fields that are a list for most rows but a bare scalar when there
+# is exactly one value
+_LIST_FIELDS = ('cpv', 'CPVs', 'adjudicatarios', 'localExecucao',
+                'tipoContrato', 'adjudicante')
+
+
+def _normalize_list_fields(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Wrap scalar values of list-typed API fields into one-element lists.
+
+    Normalizing at ingest means every cached row joins and iterates these
+    fields uniformly, so downstream filtering never branches on the
+    scalar shape.
+    """
+    for key in _LIST_FIELDS:
+        value = entry.get(key)
+        if value is not None and not isinstance(value, list):
+            entry[key] = [value]
+    return entry
+
+
+# Fields whose values repeat across most rows of a year: dates, the
+# handful of contract/announcement types, and recurring entity names
+_INTERN_FIELDS = ('dataPublicacao', 'tipoContrato', 'adjudicante',
+                  'modeloAnuncio', 'TipoAnuncio')
+
+
+def _hydrate(raw) -> Dict[str, Any]:
+    """
+    Deserialize a cached payload and intern its high-repetition strings.
+
+    json/orjson allocate a fresh string per value, so a year-scale result
+    set carries thousands of copies of the same date or contract type.
+    sys.intern collapses each distinct value to one shared object, which
+    shrinks the resident set and makes downstream == checks pointer
+    comparisons.
+    """
+    entry = _json_loads(raw)
+    intern = sys.intern
+    for key in _INTERN_FIELDS:
+        value = entry.get(key)
+        if type(value) is str:
+            entry[key] = intern(value)
+        elif type(value) is list:
+            entry[key] = [intern(v) if type(v) is str else v for v in value]
+    return entry
+
+
+def _sortable_date(date_str: Optional[str]) -> Optional[str]:
+    """Convert "DD/MM/YYYY" to lexically sortable "YYYY-MM-DD" (or None)."""
+    if not date_str:
+        return None
+    parts = date_str.split('/')
+    if len(parts) != 3:
+        return None
+    return f"{parts[2]}-{parts[1]}-{parts[0]}"
+
+
+def _content_hash(raw: str) -> str:
+    """Short deterministic digest of a serialized payload for change checks."""
+    return hashlib.blake2b(raw.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def _split_adjudicatario(entry: Any) -> tuple:
+    """
+    Split an adjudicatario entry ("NIF - Name") into (nif, nome).
+
+    Entries without the separator keep the full text in both fields so
+    they still round-trip through the side table.
+    """
+    text = str(entry)
+    nif, sep, nome = text.partition(' - ')
+    if not sep:
+        return text.strip(), text.strip()
+    return nif.strip(), nome.strip()
+
+
+# Hot-path SQL as module-level constants: sqlite3 caches prepared statements
+# per connection keyed on the exact SQL text, so reusing the same string
+# skips the parse/plan step on every call after the first.
+_SQL_CONTRACTS_BY_DATE = "SELECT raw_data FROM contracts WHERE data_publicacao = ?"
+_SQL_ANNOUNCEMENTS_BY_DATE = "SELECT raw_data FROM announcements WHERE data_publicacao = ?"
+# Range queries are additionally scoped to the years the range touches,
+# which lets the planner drive the composite (ano, data_publicacao_sortable)
+# index with per-year range scans. The SQL text is stable for a given year
+# count, so the prepared-statement cache still applies.
+_SQL_CONTRACTS_BY_RANGE = (
+    "SELECT raw_data FROM contracts"
+    " WHERE ano IN ({placeholders}) AND data_publicacao_sortable BETWEEN ? AND ?"
+)
+_SQL_ANNOUNCEMENTS_BY_RANGE = (
+    "SELECT raw_data FROM announcements"
+    " WHERE ano IN ({placeholders}) AND data_publicacao_sortable BETWEEN ? AND ?"
+)
+_SQL_CONTRACTS_BY_ADJUDICATARIO = (
+    "SELECT c.raw_data FROM contract_adjudicatarios a"
+    " JOIN contracts c ON c.id_contrato = a.id_contrato"
+    " WHERE a.nif = ?"
+)
+# CPV filtering pushed into SQL: json_each unpacks the raw payload's cpv
+# array inside SQLite, so rows without a matching code prefix are
+# rejected before Python ever JSON-decodes them
+_SQL_CONTRACTS_BY_DATE_CPV = (
+    "SELECT raw_data FROM contracts"
+    " WHERE data_publicacao = ? AND EXISTS ("
+    "SELECT 1 FROM json_each(contracts.raw_data, '$.cpv')"
+    " WHERE {clauses})"
+)
+_SQL_ANNOUNCEMENT_EXISTS = "SELECT n_anuncio FROM announcements WHERE n_anuncio = ?"
+_SQL_ANNOUNCEMENT_PROCESSED = (
+    "SELECT n_anuncio FROM processed_announcements WHERE n_anuncio = ?"
+)
+_SQL_LAST_FETCHED = "SELECT last_fetched FROM cache_metadata WHERE year = ?"
+
 
 class CachedBaseAPIClient:
     """
@@ -27,47 +160,159 @@ class CachedBaseAPIClient:
         """
         self.client = BaseAPIClient(access_token)
         self.db_path = db_path
+        # One long-lived write connection: opening a handle per query
+        # re-opens the db/-wal/-shm files and re-parses the header every
+        # time. SQLite is built in serialized threading mode, so sharing it
+        # is safe; the lock keeps multi-statement write transactions atomic
+        # across threads.
+        self._lock = threading.RLock()
+        self._conn = self._connect()
+        # Years already confirmed fresh today (year -> date of the check):
+        # saves a metadata query per get_* call once a year has been checked
+        self._fresh_years: Dict[str, Any] = {}
+        # Read-only connections (one per thread, created lazily): readers
+        # never contend on the writer handle, and mode=ro lets SQLite skip
+        # all locking needed only by writers.
+        self._read_local = threading.local()
+        # Single background worker for stale-year refreshes: queries serve
+        # whatever the cache already holds instead of blocking on the fetch.
+        # One worker keeps the writes serialized; _syncing dedupes submits.
+        self._sync_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="cache-sync"
+        )
+        self._syncing: set = set()
         self._init_database()
-    
+
+    def _connect(self, readonly: bool = False) -> sqlite3.Connection:
+        """
+        Open a connection with the performance pragmas this cache relies on.
+
+        WAL mode means readers no longer block writers (and vice versa),
+        and synchronous=NORMAL halves the fsyncs per commit — safe in WAL,
+        where a crash can only lose the last transaction, never corrupt.
+        """
+        if readonly:
+            conn = sqlite3.connect(
+                f"file:{self.db_path}?mode=ro", uri=True,
+                check_same_thread=False, cached_statements=256
+            )
+        else:
+            conn = sqlite3.connect(
+                self.db_path, check_same_thread=False, cached_statements=256
+            )
+            # 8 KB pages halve the b-tree depth for these JSON-heavy rows;
+            # only takes effect on a fresh database (or after the one-time
+            # VACUUM in _init_database), so it must come before any writes
+            conn.execute("PRAGMA page_size=8192")
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            # Needed so INSERT OR REPLACE fires the delete trigger for the
+            # displaced row, keeping the cache_stats counters exact
+            conn.execute("PRAGMA recursive_triggers=ON")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        # Map up to 1 GB of the file directly so hot lookups skip read()
+        # syscalls entirely; the mapping is shared between connections,
+        # unlike the (per-connection) 256 MB page cache below
+        conn.execute("PRAGMA mmap_size=1073741824")
+        conn.execute("PRAGMA cache_size=-262144")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    def _read_conn(self) -> sqlite3.Connection:
+        """Get this thread's read-only connection, opening it on first use."""
+        conn = getattr(self._read_local, 'conn', None)
+        if conn is None:
+            conn = self._connect(readonly=True)
+            self._read_local.conn = conn
+        return conn
+
     def _init_database(self):
         """Initialize the SQLite database with necessary tables."""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._conn
         cursor = conn.cursor()
         
-        # Create contracts table
+        # Create contracts table. List-valued sub-fields (tipoContrato,
+        # adjudicante, adjudicatarios, cpv, localExecucao) live only inside
+        # raw_data and are reachable with json_extract(raw_data, '$.field') —
+        # serializing them into their own columns doubled the JSON work per
+        # row without any query using them.
+        # The INTEGER PRIMARY KEY aliases SQLite's rowid, so the table b-tree
+        # is keyed by a compact integer and the natural TEXT key needs just
+        # one unique index (the old TEXT PRIMARY KEY + UNIQUE pair built two
+        # identical ones).
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS contracts (
-                id_contrato TEXT PRIMARY KEY,
+                id INTEGER PRIMARY KEY,
+                id_contrato TEXT NOT NULL UNIQUE,
                 data_publicacao TEXT,
                 data_celebracao TEXT,
                 ano TEXT,
                 n_anuncio TEXT,
                 objeto_contrato TEXT,
                 preco_contratual TEXT,
-                tipo_contrato TEXT,
-                adjudicante TEXT,
-                adjudicatarios TEXT,
-                cpv TEXT,
-                local_execucao TEXT,
+                data_publicacao_sortable TEXT,
                 raw_data TEXT,
-                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(id_contrato)
+                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         """)
+
+        # Databases created before the sortable-date column existed need it
+        # added and backfilled so range queries can use the index below.
+        try:
+            cursor.execute("ALTER TABLE contracts ADD COLUMN data_publicacao_sortable TEXT")
+        except sqlite3.OperationalError:
+            pass  # Column already exists
+        cursor.execute("""
+            UPDATE contracts
+            SET data_publicacao_sortable =
+                substr(data_publicacao, 7, 4) || '-' ||
+                substr(data_publicacao, 4, 2) || '-' ||
+                substr(data_publicacao, 1, 2)
+            WHERE data_publicacao_sortable IS NULL
+              AND data_publicacao IS NOT NULL
+        """)
+
+        # Payload digest for change detection; pre-existing rows keep NULL
+        # (hash mismatch) and get rewritten once on their next sync.
+        try:
+            cursor.execute("ALTER TABLE contracts ADD COLUMN content_hash TEXT")
+        except sqlite3.OperationalError:
+            pass  # Column already exists
         
         # Create announcements table
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS announcements (
-                n_anuncio TEXT PRIMARY KEY,
+                id INTEGER PRIMARY KEY,
+                n_anuncio TEXT NOT NULL UNIQUE,
                 data_publicacao TEXT,
                 ano TEXT,
                 tipo_anuncio TEXT,
                 nif_entidade TEXT,
+                data_publicacao_sortable TEXT,
                 raw_data TEXT,
-                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(n_anuncio)
+                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         """)
+
+        # Same sortable-date migration as contracts above
+        try:
+            cursor.execute("ALTER TABLE announcements ADD COLUMN data_publicacao_sortable TEXT")
+        except sqlite3.OperationalError:
+            pass  # Column already exists
+        cursor.execute("""
+            UPDATE announcements
+            SET data_publicacao_sortable =
+                substr(data_publicacao, 7, 4) || '-' ||
+                substr(data_publicacao, 4, 2) || '-' ||
+                substr(data_publicacao, 1, 2)
+            WHERE data_publicacao_sortable IS NULL
+              AND data_publicacao IS NOT NULL
+        """)
+
+        try:
+            cursor.execute("ALTER TABLE announcements ADD COLUMN content_hash TEXT")
+        except sqlite3.OperationalError:
+            pass  # Column already exists
         
         # Create cache metadata table
         cursor.execute("""
@@ -77,6 +322,36 @@ class CachedBaseAPIClient:
                 record_count INTEGER
             )
         """)
+
+        # Row counters maintained by triggers so get_cache_stats never has
+        # to run COUNT(*) over the big tables. Seeded from a one-time count
+        # when the row is first created.
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS cache_stats (
+                table_name TEXT PRIMARY KEY,
+                row_count INTEGER NOT NULL
+            )
+        """)
+        cursor.execute("""
+            INSERT OR IGNORE INTO cache_stats (table_name, row_count)
+            VALUES ('contracts', (SELECT COUNT(*) FROM contracts)),
+                   ('announcements', (SELECT COUNT(*) FROM announcements))
+        """)
+        for table in ('contracts', 'announcements'):
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_count_insert
+                AFTER INSERT ON {table} BEGIN
+                    UPDATE cache_stats SET row_count = row_count + 1
+                    WHERE table_name = '{table}';
+                END
+            """)
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_count_delete
+                AFTER DELETE ON {table} BEGIN
+                    UPDATE cache_stats SET row_count = row_count - 1
+                    WHERE table_name = '{table}';
+                END
+            """)
         
         # Create saved searches table
         cursor.execute("""
@@ -92,11 +367,11 @@ class CachedBaseAPIClient:
         # Create processed announcements table (for HubSpot automation)
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS processed_announcements (
-                n_anuncio TEXT PRIMARY KEY,
+                id INTEGER PRIMARY KEY,
+                n_anuncio TEXT NOT NULL UNIQUE,
                 processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 hubspot_deal_id TEXT,
-                saved_search_name TEXT,
-                UNIQUE(n_anuncio)
+                saved_search_name TEXT
             )
         """)
         
@@ -114,25 +389,88 @@ class CachedBaseAPIClient:
             )
         """)
         
-        # Create index on publication dates for faster queries
+        # Normalized supplier side table: adjudicatarios arrive as
+        # "NIF - Name" strings buried in raw_data, so supplier lookups used
+        # to mean substring-matching every contract in Python. One row per
+        # (contract, supplier) with an index on nif turns that into an
+        # indexed equality JOIN. Rebuilt alongside the parent row on change.
         cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_contract_pub_date 
-            ON contracts(data_publicacao)
+            CREATE TABLE IF NOT EXISTS contract_adjudicatarios (
+                id INTEGER PRIMARY KEY,
+                id_contrato TEXT NOT NULL,
+                nif TEXT,
+                nome TEXT,
+                UNIQUE(id_contrato, nif, nome)
+            )
         """)
-        
         cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_announcement_pub_date 
+            CREATE INDEX IF NOT EXISTS idx_contract_adjudicatarios_nif
+            ON contract_adjudicatarios(nif)
+        """)
+
+        # Covering index for get_contracts_by_date: including raw_data means
+        # the lookup is satisfied entirely from the index, never touching the
+        # table b-tree. Costs extra storage, but this is the app's hottest
+        # query. The old single-column index is a redundant prefix of it.
+        # This b-tree IS the date -> rows inverted index, maintained by
+        # SQLite on every insert — no separate sync-time mapping needed.
+        cursor.execute("DROP INDEX IF EXISTS idx_contract_pub_date")
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_contract_pub_date_covering
+            ON contracts(data_publicacao, raw_data)
+        """)
+
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_announcement_pub_date
             ON announcements(data_publicacao)
         """)
+
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_contract_pub_date_sortable
+            ON contracts(data_publicacao_sortable)
+        """)
+
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_announcement_pub_date_sortable
+            ON announcements(data_publicacao_sortable)
+        """)
+
+        # Composite year+date indexes: a query scoped to a year and a date
+        # window is answered by one contiguous index range instead of a scan
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_contract_year_date
+            ON contracts(ano, data_publicacao_sortable)
+        """)
+
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_announcement_year_date
+            ON announcements(ano, data_publicacao_sortable)
+        """)
         
         cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_processed_announcements 
+            CREATE INDEX IF NOT EXISTS idx_processed_announcements
             ON processed_announcements(n_anuncio)
         """)
-        
+
         conn.commit()
-        conn.close()
-    
+
+        # One-time rebuild for databases created with the 4 KB default page
+        # size: page_size only applies to a fresh file or after VACUUM, and
+        # the page size cannot change while in WAL mode, hence the journal
+        # mode dance. Gated on user_version so it never runs twice.
+        if conn.execute("PRAGMA user_version").fetchone()[0] < 1:
+            if conn.execute("PRAGMA page_size").fetchone()[0] < 8192:
+                conn.execute("PRAGMA journal_mode=DELETE")
+                conn.execute("PRAGMA page_size=8192")
+                conn.execute("VACUUM")
+                conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA user_version=1")
+
+        # Refresh planner statistics so the query planner keeps choosing
+        # the date/year indexes as the tables grow; a no-op when the
+        # analysis is already current
+        conn.execute("PRAGMA optimize")
+
     def _should_refresh_cache(self, year: str) -> bool:
         """
         Check if cache for a year should be refreshed.
@@ -146,24 +484,26 @@ class CachedBaseAPIClient:
         Returns:
             True if cache should be refreshed, False otherwise
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute(
-            "SELECT last_fetched FROM cache_metadata WHERE year = ?",
-            (year,)
-        )
+        today = datetime.now().date()
+
+        # Freshness only changes at the day boundary, so once a year has
+        # been confirmed fresh we can answer from memory until tomorrow
+        if self._fresh_years.get(year) == today:
+            return False
+
+        cursor = self._read_conn().execute(_SQL_LAST_FETCHED, (year,))
         result = cursor.fetchone()
-        conn.close()
-        
+
         if not result:
             return True  # Never cached
-        
+
         last_fetched = datetime.fromisoformat(result[0]).date()
-        today = datetime.now().date()
-        
+
         # Refresh if last fetch was on a different day
-        return last_fetched < today
+        if last_fetched < today:
+            return True
+        self._fresh_years[year] = today
+        return False
     
     def sync_year(self, year: str, force: bool = False):
         """
@@ -178,140 +518,304 @@ class CachedBaseAPIClient:
             return
         
         print(f"Syncing data for year {year}...")
-        
+
+        synced = False
+
         # Fetch contracts
         try:
             contracts = self.client.search_contracts_by_year(year)
             self._store_contracts(contracts, year)
+            synced = True
             print(f"✅ Synced {len(contracts)} contracts for {year}")
         except Exception as e:
             print(f"❌ Error syncing contracts: {e}")
-        
+
         # Fetch announcements
         try:
             announcements = self.client.get_announcement_info(ano=year)
             if not isinstance(announcements, list):
                 announcements = [announcements] if announcements else []
             self._store_announcements(announcements, year)
+            synced = True
             print(f"✅ Synced {len(announcements)} announcements for {year}")
         except Exception as e:
             print(f"❌ Error syncing announcements: {e}")
+
+        # Freshly synced: later calls this run can skip the metadata check.
+        # Only when at least one store landed, though — a fully failed sync
+        # must leave the year stale so the next query retries instead of
+        # pinning empty data as "fresh" until tomorrow.
+        if synced:
+            self._fresh_years[year] = datetime.now().date()
     
+    def _sync_stale_years(self, start_year: str, end_year: str):
+        """
+        Sync every year in [start_year, end_year] whose cache is stale.
+
+        Years are fetched concurrently — sync time is dominated by the API
+        download, so overlapping the requests makes a multi-year refresh as
+        slow as its slowest year rather than the sum of them. Database
+        writes still serialize on the instance lock.
+        """
+        stale = [
+            str(year)
+            for year in range(int(start_year), int(end_year) + 1)
+            if self._should_refresh_cache(str(year))
+        ]
+        if not stale:
+            return
+        if len(stale) == 1:
+            self.sync_year(stale[0])
+            return
+        with ThreadPoolExecutor(max_workers=min(4, len(stale))) as executor:
+            for future in [executor.submit(self.sync_year, year) for year in stale]:
+                future.result()
+
+    def _maybe_sync(self, year: str, allow_stale: bool = True) -> bool:
+        """
+        Keep a year fresh without making the caller wait for the refresh.
+
+        A year that has never been cached still syncs synchronously (there
+        is nothing to serve yet), but once any data exists, stale years are
+        refreshed on the background worker and the query is answered from
+        the current cache immediately — yesterday's data now, not a
+        minutes-long fetch at query time.
+
+        Args:
+            year: Year the caller is about to query
+            allow_stale: When False, a stale year is refreshed
+                synchronously before returning instead of in the
+                background, so the caller's query sees current data
+
+        Returns:
+            True if the caller will be served from a stale snapshot
+            (a background refresh is running or already in flight),
+            False if the cache is fresh for the year.
+        """
+        if not self._should_refresh_cache(year):
+            return False
+
+        # Never cached: block, otherwise the caller would get nothing
+        cursor = self._read_conn().execute(_SQL_LAST_FETCHED, (year,))
+        if cursor.fetchone() is None:
+            self.sync_year(year)
+            return False
+
+        if not allow_stale:
+            self.sync_year(year)
+            return False
+
+        with self._lock:
+            if year in self._syncing:
+                return True
+            self._syncing.add(year)
+        self._sync_executor.submit(self._background_sync, year)
+        return True
+
+    def _background_sync(self, year: str):
+        """Run sync_year on the worker thread, releasing the dedupe marker."""
+        try:
+            self.sync_year(year)
+        except Exception as e:
+            print(f"❌ Background sync failed for year {year}: {e}")
+        finally:
+            with self._lock:
+                self._syncing.discard(year)
+
     def _store_contracts(self, contracts: List[Dict[str, Any]], year: str):
         """Store contracts in the database."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
+        conn = self._conn
+
+        now_iso = datetime.now().isoformat()
+
+        # One bulk read of the content hashes we already have for the year:
+        # rows whose payload digest is unchanged are skipped instead of being
+        # rewritten (and re-indexed) on every sync. Comparing 16-char hashes
+        # also keeps the working set tiny next to holding full payloads.
+        existing = dict(self._read_conn().execute(
+            "SELECT id_contrato, content_hash FROM contracts WHERE ano = ?", (year,)
+        ))
+
+        rows = []
+        adj_rows = []
+        changed_ids = []
         for contract in contracts:
-            cursor.execute("""
-                INSERT OR REPLACE INTO contracts 
-                (id_contrato, data_publicacao, data_celebracao, ano, n_anuncio,
-                 objeto_contrato, preco_contratual, tipo_contrato, adjudicante,
-                 adjudicatarios, cpv, local_execucao, raw_data, last_updated)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                contract.get('idContrato'),
+            raw = _json_dumps(_normalize_list_fields(contract))
+            raw_hash = _content_hash(raw)
+            contract_id = contract.get('idContrato')
+            if existing.get(contract_id) == raw_hash:
+                continue
+            rows.append((
+                contract_id,
                 contract.get('dataPublicacao'),
                 contract.get('dataCelebracaoContrato'),
                 contract.get('Ano'),
                 contract.get('nAnuncio'),
                 contract.get('objectoContrato'),
                 contract.get('precoContratual'),
-                json.dumps(contract.get('tipoContrato', [])),
-                json.dumps(contract.get('adjudicante', [])),
-                json.dumps(contract.get('adjudicatarios', [])),
-                json.dumps(contract.get('cpv', [])),
-                json.dumps(contract.get('localExecucao', [])),
-                json.dumps(contract),
-                datetime.now().isoformat()
+                _sortable_date(contract.get('dataPublicacao')),
+                raw,
+                raw_hash,
+                now_iso
             ))
-        
-        # Update metadata
-        cursor.execute("""
-            INSERT OR REPLACE INTO cache_metadata (year, last_fetched, record_count)
-            VALUES (?, ?, ?)
-        """, (year, datetime.now().isoformat(), len(contracts)))
-        
-        conn.commit()
-        conn.close()
-    
+            # Normalized supplier rows for this contract, rebuilt from scratch
+            changed_ids.append((contract_id,))
+            adjudicatarios = contract.get('adjudicatarios')
+            if isinstance(adjudicatarios, list):
+                for entry in adjudicatarios:
+                    nif, nome = _split_adjudicatario(entry)
+                    adj_rows.append((contract_id, nif, nome))
+
+        # Single transaction: one commit (and one fsync) for the whole batch
+        # instead of sqlite3's implicit per-statement transactions
+        with self._lock, conn:
+            # ON CONFLICT DO UPDATE ... WHERE the hash differs: unchanged
+            # rows are skipped inside the VDBE — no delete, no re-insert,
+            # no WAL frame — and updated rows keep their rowid, so the
+            # count triggers and indexes see an UPDATE, not a REPLACE.
+            conn.executemany("""
+                INSERT INTO contracts
+                (id_contrato, data_publicacao, data_celebracao, ano, n_anuncio,
+                 objeto_contrato, preco_contratual, data_publicacao_sortable,
+                 raw_data, content_hash, last_updated)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id_contrato) DO UPDATE SET
+                    data_publicacao = excluded.data_publicacao,
+                    data_celebracao = excluded.data_celebracao,
+                    ano = excluded.ano,
+                    n_anuncio = excluded.n_anuncio,
+                    objeto_contrato = excluded.objeto_contrato,
+                    preco_contratual = excluded.preco_contratual,
+                    data_publicacao_sortable = excluded.data_publicacao_sortable,
+                    raw_data = excluded.raw_data,
+                    content_hash = excluded.content_hash,
+                    last_updated = excluded.last_updated
+                WHERE contracts.content_hash IS NOT excluded.content_hash
+            """, rows)
+
+            # Keep the supplier side table in step with the parent rows:
+            # drop and re-insert only the contracts that actually changed
+            conn.executemany(
+                "DELETE FROM contract_adjudicatarios WHERE id_contrato = ?",
+                changed_ids
+            )
+            conn.executemany("""
+                INSERT OR IGNORE INTO contract_adjudicatarios (id_contrato, nif, nome)
+                VALUES (?, ?, ?)
+            """, adj_rows)
+
+            # Update metadata
+            conn.execute("""
+                INSERT OR REPLACE INTO cache_metadata (year, last_fetched, record_count)
+                VALUES (?, ?, ?)
+            """, (year, now_iso, len(contracts)))
+
+
     def _store_announcements(self, announcements: List[Dict[str, Any]], year: str):
         """Store announcements in the database."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
+        conn = self._conn
+
+        now_iso = datetime.now().isoformat()
+
+        # Skip unchanged rows by content hash, as in _store_contracts
+        existing = dict(self._read_conn().execute(
+            "SELECT n_anuncio, content_hash FROM announcements WHERE ano = ?", (year,)
+        ))
+
+        rows = []
         for announcement in announcements:
-            cursor.execute("""
-                INSERT OR REPLACE INTO announcements 
-                (n_anuncio, data_publicacao, ano, tipo_anuncio, nif_entidade, 
-                 raw_data, last_updated)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
+            raw = _json_dumps(_normalize_list_fields(announcement))
+            raw_hash = _content_hash(raw)
+            if existing.get(announcement.get('nAnuncio')) == raw_hash:
+                continue
+            rows.append((
                 announcement.get('nAnuncio'),
                 announcement.get('dataPublicacao'),
                 announcement.get('Ano'),
                 announcement.get('TipoAnuncio'),
                 announcement.get('nifEntidade'),
-                json.dumps(announcement),
-                datetime.now().isoformat()
+                _sortable_date(announcement.get('dataPublicacao')),
+                raw,
+                raw_hash,
+                now_iso
             ))
-        
-        conn.commit()
-        conn.close()
+
+        # Single transaction for the whole batch; hash-gated upsert as in
+        # _store_contracts
+        with self._lock, conn:
+            conn.executemany("""
+                INSERT INTO announcements
+                (n_anuncio, data_publicacao, ano, tipo_anuncio, nif_entidade,
+                 data_publicacao_sortable, raw_data, content_hash, last_updated)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(n_anuncio) DO UPDATE SET
+                    data_publicacao = excluded.data_publicacao,
+                    ano = excluded.ano,
+                    tipo_anuncio = excluded.tipo_anuncio,
+                    nif_entidade = excluded.nif_entidade,
+                    data_publicacao_sortable = excluded.data_publicacao_sortable,
+                    raw_data = excluded.raw_data,
+                    content_hash = excluded.content_hash,
+                    last_updated = excluded.last_updated
+                WHERE announcements.content_hash IS NOT excluded.content_hash
+            """, rows)
+
     
-    def get_contracts_by_date(self, date_str: str) -> List[Dict[str, Any]]:
+    def get_contracts_by_date(self, date_str: str,
+                              cpv_codes: Optional[List[str]] = None,
+                              allow_stale: bool = True) -> List[Dict[str, Any]]:
         """
         Get all contracts published on a specific date.
-        
+
         Args:
             date_str: Date in format "DD/MM/YYYY"
-            
+            cpv_codes: Optional CPV codes; when given, the prefix match
+                runs inside SQLite (json_each over the payload), so
+                non-matching rows are never JSON-decoded in Python
+            allow_stale: When False, block on a synchronous refresh of a
+                stale year before querying — callers that must be
+                complete for the requested date (reports, automation)
+                need this; the interactive default serves the current
+                snapshot while the refresh runs in the background
+
         Returns:
             List of contract dictionaries
         """
-        # Extract year and ensure it's synced
-        year = date_str.split("/")[2]
-        if self._should_refresh_cache(year):
-            self.sync_year(year)
-        
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute(
-            "SELECT raw_data FROM contracts WHERE data_publicacao = ?",
-            (date_str,)
-        )
-        results = cursor.fetchall()
-        conn.close()
-        
-        return [json.loads(row[0]) for row in results]
+        # Kick off a background refresh if the year is stale; the query is
+        # served from the current cache either way (unless allow_stale=False)
+        self._maybe_sync(date_str.split("/")[2], allow_stale=allow_stale)
+
+        if cpv_codes:
+            prefixes = sorted({code.split('-', 1)[0].strip() for code in cpv_codes})
+            sql = _SQL_CONTRACTS_BY_DATE_CPV.format(
+                clauses=" OR ".join(["json_each.value LIKE ?"] * len(prefixes))
+            )
+            params = (date_str, *(prefix + '%' for prefix in prefixes))
+            cursor = self._read_conn().execute(sql, params)
+        else:
+            cursor = self._read_conn().execute(_SQL_CONTRACTS_BY_DATE, (date_str,))
+
+        return [_hydrate(row[0]) for row in cursor]
     
-    def get_announcements_by_date(self, date_str: str) -> List[Dict[str, Any]]:
+    def get_announcements_by_date(self, date_str: str,
+                                  allow_stale: bool = True) -> List[Dict[str, Any]]:
         """
         Get all announcements published on a specific date.
-        
+
         Args:
             date_str: Date in format "DD/MM/YYYY"
-            
+            allow_stale: As in get_contracts_by_date — False blocks on a
+                synchronous refresh of a stale year before querying
+
         Returns:
             List of announcement dictionaries
         """
-        # Extract year and ensure it's synced
-        year = date_str.split("/")[2]
-        if self._should_refresh_cache(year):
-            self.sync_year(year)
-        
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute(
-            "SELECT raw_data FROM announcements WHERE data_publicacao = ?",
-            (date_str,)
-        )
-        results = cursor.fetchall()
-        conn.close()
-        
-        return [json.loads(row[0]) for row in results]
+        # Background refresh on staleness, as in get_contracts_by_date
+        self._maybe_sync(date_str.split("/")[2], allow_stale=allow_stale)
+
+        cursor = self._read_conn().execute(_SQL_ANNOUNCEMENTS_BY_DATE, (date_str,))
+
+        return [_hydrate(row[0]) for row in cursor]
     
     def get_contracts_by_date_range(
         self, 
@@ -328,59 +832,68 @@ class CachedBaseAPIClient:
         Returns:
             List of contract dictionaries
         """
-        # Ensure relevant years are synced
-        start_year = start_date.split("/")[2]
-        end_year = end_date.split("/")[2]
-        
-        for year in range(int(start_year), int(end_year) + 1):
-            if self._should_refresh_cache(str(year)):
-                self.sync_year(str(year))
-        
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Convert DD/MM/YYYY to comparable format YYYY-MM-DD for proper date comparison
-        def convert_date(date_str):
-            """Convert DD/MM/YYYY to YYYY-MM-DD"""
-            parts = date_str.split('/')
-            return f"{parts[2]}-{parts[1]}-{parts[0]}"
-        
-        start_comparable = convert_date(start_date)
-        end_comparable = convert_date(end_date)
-        
-        # Get all contracts and filter by date
-        cursor.execute("""
-            SELECT raw_data, data_publicacao FROM contracts 
-            WHERE data_publicacao LIKE ?
-        """, (f"%/{start_year}",))
-        
-        results = []
-        for row in cursor.fetchall():
-            date_pub = row[1]
-            if date_pub:
-                comparable_date = convert_date(date_pub)
-                if start_comparable <= comparable_date <= end_comparable:
-                    results.append(row[0])
-        
-        conn.close()
-        
-        return [json.loads(data) for data in results]
-    
+        return list(self.iter_contracts_by_date_range(start_date, end_date))
+
+    def iter_contracts_by_date_range(
+        self,
+        start_date: str,
+        end_date: str
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream contracts published within a date range, one at a time.
+
+        Rows are fetched and JSON-parsed lazily, so callers that filter or
+        aggregate never hold the whole result set in memory.
+        """
+        # Ensure relevant years are synced (concurrently when several are stale)
+        start_year, end_year = start_date.split("/")[2], end_date.split("/")[2]
+        self._sync_stale_years(start_year, end_year)
+
+        years = [str(y) for y in range(int(start_year), int(end_year) + 1)]
+
+        cursor = self._read_conn().cursor()
+
+        # Year scoping plus the indexed sortable column: the range scan runs
+        # on the (ano, data_publicacao_sortable) index inside SQLite instead
+        # of date-converting every row of the table in Python
+        cursor.execute(
+            _SQL_CONTRACTS_BY_RANGE.format(placeholders=",".join("?" * len(years))),
+            (*years, _sortable_date(start_date), _sortable_date(end_date))
+        )
+
+        for row in cursor:
+            yield _hydrate(row[0])
+
+    def get_contracts_by_adjudicatario(self, nif: str) -> List[Dict[str, Any]]:
+        """
+        Get all cached contracts awarded to a supplier NIF.
+
+        Served by an indexed equality lookup on the normalized side table
+        instead of substring-matching every contract in Python. Only years
+        already in the cache are searched; sync years of interest first.
+
+        Args:
+            nif: Supplier NIF (tax identification number)
+
+        Returns:
+            List of contract dictionaries
+        """
+        cursor = self._read_conn().execute(_SQL_CONTRACTS_BY_ADJUDICATARIO, (nif,))
+        return [_hydrate(row[0]) for row in cursor]
+
     def get_cache_stats(self) -> Dict[str, Any]:
         """Get statistics about the cached data."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT COUNT(*) FROM contracts")
-        total_contracts = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM announcements")
-        total_announcements = cursor.fetchone()[0]
-        
+        cursor = self._read_conn().cursor()
+
+        # Served from the trigger-maintained counters, not COUNT(*) scans
+        cursor.execute("SELECT table_name, row_count FROM cache_stats")
+        counts = dict(cursor.fetchall())
+        total_contracts = counts.get('contracts', 0)
+        total_announcements = counts.get('announcements', 0)
+
         cursor.execute("SELECT year, last_fetched, record_count FROM cache_metadata")
         years_cached = cursor.fetchall()
         
-        conn.close()
         
         return {
             "total_contracts": total_contracts,
@@ -407,16 +920,11 @@ class CachedBaseAPIClient:
             True if successful, False if name already exists
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                INSERT INTO saved_searches (name, filters)
-                VALUES (?, ?)
-            """, (name, json.dumps(filters)))
-            
-            conn.commit()
-            conn.close()
+            with self._lock, self._conn:
+                self._conn.execute("""
+                    INSERT INTO saved_searches (name, filters)
+                    VALUES (?, ?)
+                """, (name, _json_dumps(filters)))
             return True
         except sqlite3.IntegrityError:
             # Name already exists
@@ -429,9 +937,8 @@ class CachedBaseAPIClient:
         Returns:
             List of saved searches with their metadata
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
+        cursor = self._read_conn().cursor()
+
         cursor.execute("""
             SELECT id, name, filters, created_at, last_used
             FROM saved_searches
@@ -443,12 +950,11 @@ class CachedBaseAPIClient:
             searches.append({
                 'id': row[0],
                 'name': row[1],
-                'filters': json.loads(row[2]),
+                'filters': _json_loads(row[2]),
                 'created_at': row[3],
                 'last_used': row[4]
             })
         
-        conn.close()
         return searches
     
     def load_search(self, name: str) -> Optional[Dict[str, Any]]:
@@ -461,9 +967,8 @@ class CachedBaseAPIClient:
         Returns:
             Dictionary of filters or None if not found
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
+        cursor = self._read_conn().cursor()
+
         cursor.execute("""
             SELECT filters FROM saved_searches
             WHERE name = ?
@@ -473,17 +978,54 @@ class CachedBaseAPIClient:
         
         if result:
             # Update last_used timestamp
-            cursor.execute("""
-                UPDATE saved_searches
-                SET last_used = CURRENT_TIMESTAMP
-                WHERE name = ?
-            """, (name,))
-            conn.commit()
-        
-        conn.close()
-        
-        return json.loads(result[0]) if result else None
+            with self._lock, self._conn:
+                self._conn.execute("""
+                    UPDATE saved_searches
+                    SET last_used = CURRENT_TIMESTAMP
+                    WHERE name = ?
+                """, (name,))
+
+        return _json_loads(result[0]) if result else None
     
+    def load_search_or_default(self, name: str,
+                               default_name: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """
+        Load a saved search by name, falling back to a default, in one query.
+
+        The IN lookup with ORDER BY (name = ?) DESC prefers the requested
+        name, so the miss-then-fallback path costs one round-trip instead
+        of two separate load_search() calls.
+
+        Args:
+            name: Name of the preferred saved search
+            default_name: Name to fall back to if the preferred one is missing
+
+        Returns:
+            (matched_name, filters) tuple, or None if neither exists
+        """
+        cursor = self._read_conn().cursor()
+
+        cursor.execute("""
+            SELECT name, filters FROM saved_searches
+            WHERE name IN (?, ?)
+            ORDER BY (name = ?) DESC
+            LIMIT 1
+        """, (name, default_name, name))
+
+        result = cursor.fetchone()
+
+        if result:
+            # Update last_used timestamp
+            with self._lock, self._conn:
+                self._conn.execute("""
+                    UPDATE saved_searches
+                    SET last_used = CURRENT_TIMESTAMP
+                    WHERE name = ?
+                """, (result[0],))
+            return result[0], _json_loads(result[1])
+
+        return None
+
     def delete_search(self, name: str) -> bool:
         """
         Delete a saved search.
@@ -494,18 +1036,13 @@ class CachedBaseAPIClient:
         Returns:
             True if deleted, False if not found
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            DELETE FROM saved_searches
-            WHERE name = ?
-        """, (name,))
-        
-        deleted = cursor.rowcount > 0
-        conn.commit()
-        conn.close()
-        
+        with self._lock, self._conn:
+            cursor = self._conn.execute("""
+                DELETE FROM saved_searches
+                WHERE name = ?
+            """, (name,))
+            deleted = cursor.rowcount > 0
+
         return deleted
     
     def sync_new_announcements(self, start_date: str, end_date: str) -> List[Dict[str, Any]]:
@@ -551,50 +1088,49 @@ class CachedBaseAPIClient:
                 end_comparable = convert_date(end_date)
                 
                 # Filter announcements by date range and check if already in cache
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
-                for announcement in announcements:
-                    pub_date = announcement.get('dataPublicacao', '')
-                    if not pub_date:
-                        continue
-                    
-                    pub_comparable = convert_date(pub_date)
-                    if not pub_comparable:
-                        continue
-                    
-                    # Check if within date range
-                    if start_comparable <= pub_comparable <= end_comparable:
-                        n_anuncio = announcement.get('nAnuncio')
-                        if not n_anuncio:
+                with self._lock, self._conn:
+                    cursor = self._conn.cursor()
+
+                    for announcement in announcements:
+                        pub_date = announcement.get('dataPublicacao', '')
+                        if not pub_date:
                             continue
-                        
-                        # Check if already in cache
-                        cursor.execute(
-                            "SELECT n_anuncio FROM announcements WHERE n_anuncio = ?",
-                            (n_anuncio,)
-                        )
-                        if not cursor.fetchone():
-                            # New announcement - store it
+
+                        pub_comparable = convert_date(pub_date)
+                        if not pub_comparable:
+                            continue
+
+                        # Check if within date range
+                        if start_comparable <= pub_comparable <= end_comparable:
+                            n_anuncio = announcement.get('nAnuncio')
+                            if not n_anuncio:
+                                continue
+
+                            # ON CONFLICT DO NOTHING + RETURNING answers
+                            # "was this new?" in the same statement, so no
+                            # per-row existence SELECT is needed
+                            raw = _json_dumps(_normalize_list_fields(announcement))
                             cursor.execute("""
-                                INSERT OR REPLACE INTO announcements 
-                                (n_anuncio, data_publicacao, ano, tipo_anuncio, nif_entidade, 
-                                 raw_data, last_updated)
-                                VALUES (?, ?, ?, ?, ?, ?, ?)
+                                INSERT INTO announcements
+                                (n_anuncio, data_publicacao, ano, tipo_anuncio, nif_entidade,
+                                 data_publicacao_sortable, raw_data, content_hash, last_updated)
+                                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                                ON CONFLICT(n_anuncio) DO NOTHING
+                                RETURNING n_anuncio
                             """, (
                                 n_anuncio,
                                 pub_date,
                                 announcement.get('Ano'),
                                 announcement.get('TipoAnuncio'),
                                 announcement.get('nifEntidade'),
-                                json.dumps(announcement),
+                                pub_comparable,
+                                raw,
+                                _content_hash(raw),
                                 datetime.now().isoformat()
                             ))
-                            new_announcements.append(announcement)
-                
-                conn.commit()
-                conn.close()
-                
+                            if cursor.fetchone():
+                                new_announcements.append(announcement)
+
             except Exception as e:
                 print(f"❌ Error syncing announcements for year {year}: {e}")
         
@@ -616,64 +1152,66 @@ class CachedBaseAPIClient:
         Returns:
             List of announcement dictionaries
         """
-        # Ensure relevant years are synced
-        start_year = start_date.split("/")[2]
-        end_year = end_date.split("/")[2]
-        
-        for year in range(int(start_year), int(end_year) + 1):
-            if self._should_refresh_cache(str(year)):
-                self.sync_year(str(year))
-        
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Convert DD/MM/YYYY to comparable format YYYY-MM-DD for proper date comparison
-        def convert_date(date_str):
-            """Convert DD/MM/YYYY to YYYY-MM-DD"""
-            parts = date_str.split('/')
-            return f"{parts[2]}-{parts[1]}-{parts[0]}"
-        
-        start_comparable = convert_date(start_date)
-        end_comparable = convert_date(end_date)
-        
-        # Get all announcements and filter by date
-        cursor.execute("""
-            SELECT raw_data, data_publicacao FROM announcements 
-            WHERE data_publicacao LIKE ?
-        """, (f"%/{start_year}",))
-        
-        results = []
-        for row in cursor.fetchall():
-            date_pub = row[1]
-            if date_pub:
-                comparable_date = convert_date(date_pub)
-                if start_comparable <= comparable_date <= end_comparable:
-                    results.append(row[0])
-        
-        conn.close()
-        
-        return [json.loads(data) for data in results]
+        return list(self.iter_announcements_by_date_range(start_date, end_date))
+
+    def iter_announcements_by_date_range(
+        self,
+        start_date: str,
+        end_date: str
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream announcements published within a date range, one at a time.
+
+        Same lazy fetch-and-parse behavior as iter_contracts_by_date_range.
+        """
+        # Ensure relevant years are synced (concurrently when several are stale)
+        start_year, end_year = start_date.split("/")[2], end_date.split("/")[2]
+        self._sync_stale_years(start_year, end_year)
+
+        years = [str(y) for y in range(int(start_year), int(end_year) + 1)]
+
+        cursor = self._read_conn().cursor()
+
+        # Indexed per-year range scan in SQLite; only matching rows get JSON-parsed
+        cursor.execute(
+            _SQL_ANNOUNCEMENTS_BY_RANGE.format(placeholders=",".join("?" * len(years))),
+            (*years, _sortable_date(start_date), _sortable_date(end_date))
+        )
+
+        for row in cursor:
+            yield _hydrate(row[0])
     
+    def get_processed_announcements(self) -> set:
+        """
+        Get every announcement number already marked as processed.
+
+        One scan feeding a set, for callers that would otherwise call
+        is_announcement_processed once per row.
+
+        Returns:
+            Set of announcement numbers
+        """
+        cursor = self._read_conn().execute(
+            "SELECT n_anuncio FROM processed_announcements"
+        )
+        return {row[0] for row in cursor}
+
     def is_announcement_processed(self, n_anuncio: str) -> bool:
         """
         Check if an announcement has already been processed for HubSpot.
-        
+
+        One SELECT per call — for loops over many announcements, load
+        get_processed_announcements() once and test membership instead.
+
         Args:
             n_anuncio: Announcement number
-            
+
         Returns:
             True if already processed, False otherwise
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute(
-            "SELECT n_anuncio FROM processed_announcements WHERE n_anuncio = ?",
-            (n_anuncio,)
-        )
+        cursor = self._read_conn().execute(_SQL_ANNOUNCEMENT_PROCESSED, (n_anuncio,))
         result = cursor.fetchone() is not None
         
-        conn.close()
         return result
     
     def mark_announcement_processed(
@@ -690,17 +1228,12 @@ class CachedBaseAPIClient:
             hubspot_deal_id: HubSpot deal ID if deal was created
             saved_search_name: Name of saved search used for filtering
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT OR REPLACE INTO processed_announcements 
-            (n_anuncio, hubspot_deal_id, saved_search_name, processed_at)
-            VALUES (?, ?, ?, ?)
-        """, (n_anuncio, hubspot_deal_id, saved_search_name, datetime.now().isoformat()))
-        
-        conn.commit()
-        conn.close()
+        with self._lock, self._conn:
+            self._conn.execute("""
+                INSERT OR REPLACE INTO processed_announcements
+                (n_anuncio, hubspot_deal_id, saved_search_name, processed_at)
+                VALUES (?, ?, ?, ?)
+            """, (n_anuncio, hubspot_deal_id, saved_search_name, datetime.now().isoformat()))
     
     def log_daily_sync(
         self,
@@ -724,25 +1257,20 @@ class CachedBaseAPIClient:
             sync_status: Status ("success", "error", "partial")
             error_message: Error message if any
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT OR REPLACE INTO daily_sync_log 
-            (sync_date, announcements_fetched, announcements_new, deals_created, 
-             deals_failed, sync_status, error_message, sync_timestamp)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            sync_date,
-            announcements_fetched,
-            announcements_new,
-            deals_created,
-            deals_failed,
-            sync_status,
-            error_message,
-            datetime.now().isoformat()
-        ))
-        
-        conn.commit()
-        conn.close()
+        with self._lock, self._conn:
+            self._conn.execute("""
+                INSERT OR REPLACE INTO daily_sync_log
+                (sync_date, announcements_fetched, announcements_new, deals_created,
+                 deals_failed, sync_status, error_message, sync_timestamp)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                sync_date,
+                announcements_fetched,
+                announcements_new,
+                deals_created,
+                deals_failed,
+                sync_status,
+                error_message,
+                datetime.now().isoformat()
+            ))
 
@@ -6,6 +6,7 @@ Shows various ways to query data efficiently with local caching.
 
 from cached_api_client import CachedBaseAPIClient
 from config import get_api_key
+from filter_utils import sum_prices
 from datetime import datetime, timedelta
 
 
@@ -40,16 +41,9 @@ def main():
     contracts = client.get_contracts_by_date_range(week_ago, today)
     print(f"   Contracts in last 7 days: {len(contracts)}")
     
-    # Calculate total value
+    # Calculate total value in one bulk pass (exactly rounded)
     if contracts:
-        total_value = 0
-        for contract in contracts:
-            price_str = contract.get("precoContratual", "0")
-            try:
-                price = float(price_str.replace(".", "").replace(",", "."))
-                total_value += price
-            except (ValueError, AttributeError):
-                pass
+        total_value = sum_prices(c.get("precoContratual", "0") for c in contracts)
         print(f"   Total value: €{total_value:,.2f}")
     
     # Example 4: Get specific date data
@@ -1,52 +1,117 @@
 """
 Configuration management for Portal Base API Client
 
-Loads API key from Streamlit secrets, environment variables, or Secrets file.
-Priority: Streamlit secrets > Environment variable > Secrets file
+Loads API key from environment variables, Secrets file, or Streamlit secrets.
+Priority: Environment variable > Secrets file > Streamlit secrets
+(cheapest lookup first: env is a dict access, the file one stat, and
+streamlit the expensive branch)
 """
 
 import os
+import sys
+
+# Only touch streamlit when it is plausibly in play: the app imports it
+# before config (so it is in sys.modules), and Streamlit Cloud sets its
+# env vars. Headless scripts (daily_automation.py etc.) skip the heavy
+# import entirely — it costs ~100ms and thousands of module loads.
+_ALLOW_STREAMLIT = (
+    "streamlit" in sys.modules
+    or "STREAMLIT_SERVER_PORT" in os.environ
+    or os.environ.get("STREAMLIT_RUNTIME") is not None
+)
+if _ALLOW_STREAMLIT:
+    try:
+        import streamlit as st
+        _HAS_STREAMLIT = True
+    except ImportError:
+        st = None
+        _HAS_STREAMLIT = False
+else:
+    st = None
+    _HAS_STREAMLIT = False
+
+
+# Parsed Secrets file, keyed by the file's mtime: a stat() per access
+# replaces the open()+parse(), while rotated credentials are still picked
+# up without a process restart because a new mtime forces a re-read.
+_secrets_cache = {"mtime": None, "data": {}}
+
+# Computed once at module load; the getters never rebuild the path
+_SECRETS_PATH = os.path.join(os.path.dirname(__file__), 'Secrets')
+
+
+def _load_secrets_file():
+    """
+    Parse the local Secrets file into a dict of KEY -> value.
+
+    Lines look like KEY:"value" (quotes optional). The parsed dict is
+    cached against the file's mtime, so repeated reads cost one stat()
+    until the file actually changes. Returns an empty dict if the file
+    is missing or unreadable.
+    """
+    try:
+        mtime = os.stat(_SECRETS_PATH).st_mtime_ns
+    except OSError:
+        _secrets_cache["mtime"] = None
+        _secrets_cache["data"] = {}
+        return _secrets_cache["data"]
+
+    if mtime == _secrets_cache["mtime"]:
+        return _secrets_cache["data"]
+
+    secrets = {}
+    try:
+        with open(_SECRETS_PATH, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if not line or ':' not in line:
+                    continue
+                key, value = line.split(':', 1)
+                value = value.strip().strip('"')
+                if value:
+                    secrets[key.strip()] = value
+    except OSError:
+        return _secrets_cache["data"]
+
+    _secrets_cache["mtime"] = mtime
+    _secrets_cache["data"] = secrets
+    return secrets
 
 
 def get_api_key():
     """
-    Get the API key from Streamlit secrets, environment variable, or Secrets file.
-    
+    Get the API key from environment variable, Secrets file, or Streamlit secrets.
+
+    Deliberately not lru_cached: a per-call lookup costs one dict access
+    and one stat() (the Secrets file is re-parsed only when its mtime
+    changes), and it keeps credential rotation working without a restart.
+
     Returns:
         str: The API key
-        
+
     Raises:
         ValueError: If API key is not found
     """
-    # Try Streamlit secrets first (for Streamlit Cloud deployments)
-    try:
-        import streamlit as st
-        if hasattr(st, 'secrets') and 'BASE_API_KEY' in st.secrets:
-            return st.secrets['BASE_API_KEY']
-    except (ImportError, FileNotFoundError, KeyError):
-        pass
-    
-    # Try environment variable
+    # Try environment variable first — it is set in the automation/CI
+    # path and costs a dict access, vs. streamlit's heavyweight secrets
     api_key = os.environ.get('BASE_API_KEY')
-    
+
     if api_key:
         return api_key
-    
+
     # Try reading from Secrets file (for local development)
-    secrets_file = os.path.join(os.path.dirname(__file__), 'Secrets')
-    if os.path.exists(secrets_file):
+    api_key = _load_secrets_file().get('BASE_API_KEY')
+    if api_key:
+        return api_key
+
+    # Try Streamlit secrets last (for Streamlit Cloud deployments)
+    if _HAS_STREAMLIT:
         try:
-            with open(secrets_file, 'r') as f:
-                for line in f:
-                    line = line.strip()
-                    if line.startswith('BASE_API_KEY'):
-                        if ':' in line:
-                            api_key = line.split(':', 1)[1].strip().strip('"')
-                            if api_key:
-                                return api_key
-        except Exception as e:
+            if hasattr(st, 'secrets') and 'BASE_API_KEY' in st.secrets:
+                return st.secrets['BASE_API_KEY']
+        except (FileNotFoundError, KeyError):
             pass
-    
+
     # If not found, raise error
     raise ValueError(
         "API key not found! Please set BASE_API_KEY in Streamlit secrets (for cloud) "
@@ -65,7 +130,10 @@ except ValueError:
 def get_hubspot_token():
     """
     Get HubSpot API token from environment variable or Secrets file.
-    
+
+    Uncached for the same reason as get_api_key: the mtime-gated loader
+    already makes repeat calls cheap, and rotation must take effect live.
+
     Returns:
         str: The HubSpot API token
         
@@ -78,29 +146,18 @@ def get_hubspot_token():
         return token
     
     # Try reading from Secrets file (for local development)
-    secrets_file = os.path.join(os.path.dirname(__file__), 'Secrets')
-    if os.path.exists(secrets_file):
+    token = _load_secrets_file().get('HUBSPOT_API_TOKEN')
+    if token:
+        return token
+
+    # Try Streamlit secrets (for cloud deployments)
+    if _HAS_STREAMLIT:
         try:
-            with open(secrets_file, 'r') as f:
-                content = f.read().strip()
-                # Handle format: HUBSPOT_API_TOKEN:"value" or HUBSPOT_API_TOKEN:value
-                for line in content.split('\n'):
-                    if line.strip().startswith('HUBSPOT_API_TOKEN'):
-                        if ':' in line:
-                            token = line.split(':', 1)[1].strip().strip('"')
-                            if token:
-                                return token
-        except Exception:
+            if hasattr(st, 'secrets') and 'HUBSPOT_API_TOKEN' in st.secrets:
+                return st.secrets['HUBSPOT_API_TOKEN']
+        except (FileNotFoundError, KeyError):
             pass
-    
-    # Try Streamlit secrets (for cloud deployments)
-    try:
-        import streamlit as st
-        if hasattr(st, 'secrets') and 'HUBSPOT_API_TOKEN' in st.secrets:
-            return st.secrets['HUBSPOT_API_TOKEN']
-    except (ImportError, FileNotFoundError, KeyError):
-        pass
-    
+
     raise ValueError(
         "HubSpot API token not found! Please set HUBSPOT_API_TOKEN environment variable "
         "or add it to Secrets file as: HUBSPOT_API_TOKEN:\"your_token_here\""
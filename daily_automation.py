@@ -11,24 +11,47 @@ This script:
 Designed to run daily via GitHub Actions or scheduled task.
 """
 
+import json
+import os
+import sqlite3
 import sys
 from datetime import datetime, timedelta
 from cached_api_client import CachedBaseAPIClient
 from config import get_api_key
 from filter_utils import filter_contracts
-from hubspot_automation import create_deal_from_announcement, check_deal_exists, get_hubspot_token
-import time
+from hubspot_automation import create_deals_from_announcements, check_deals_exist, get_hubspot_token
+
+# orjson serializes several times faster than the stdlib and returns bytes
+# (SQLite stores those fine); fall back silently so the script keeps
+# working in environments without it
+try:
+    import orjson
+    _json_dumps = orjson.dumps
+except ImportError:
+    def _json_dumps(obj):
+        return json.dumps(obj).encode()
+
+
+def _announcement_number(n_anuncio):
+    """Numeric prefix of an 'NNNN/YYYY' announcement id, or 0 if unparseable."""
+    try:
+        return int(str(n_anuncio).split('/', 1)[0])
+    except ValueError:
+        return 0
 
 
 def main():
     """Main automation function."""
+    # One wall-clock read for the whole run: every derived value (banner,
+    # date window, sync date, row timestamps) comes from the same instant
+    now = datetime.now()
+    now_iso = now.isoformat()
+
     print("=" * 80)
     print("🔄 Portal Base Daily Automation")
     print("=" * 80)
-    print(f"Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-    
-    import os
-    
+    print(f"Started at: {now.strftime('%Y-%m-%d %H:%M:%S')}\n")
+
     # Configuration
     # Set the name of the saved search to use for filtering
     # This should match a saved search created in the Streamlit app
@@ -37,12 +60,12 @@ def main():
     # Date range: yesterday (announcements published before 5 PM are usually available)
     # You can adjust this to check last N days
     DAYS_TO_CHECK = int(os.environ.get('DAYS_TO_CHECK', '1'))
-    end_date = datetime.now() - timedelta(days=1)  # Yesterday
+    end_date = now - timedelta(days=1)  # Yesterday
     start_date = end_date - timedelta(days=DAYS_TO_CHECK - 1)
-    
+
     start_date_str = start_date.strftime('%d/%m/%Y')
     end_date_str = end_date.strftime('%d/%m/%Y')
-    sync_date = datetime.now().strftime('%Y-%m-%d')
+    sync_date = now.strftime('%Y-%m-%d')
     
     print(f"📅 Date range: {start_date_str} to {end_date_str}")
     print(f"🔍 Using saved search: {SAVED_SEARCH_NAME}\n")
@@ -54,15 +77,17 @@ def main():
         client = CachedBaseAPIClient(api_key)
         print("✅ API client initialized\n")
         
-        # Load saved search filters
+        # Load saved search filters (one query resolves the requested
+        # search and the 'Default Automation' fallback together)
         print(f"📋 Loading saved search: {SAVED_SEARCH_NAME}...")
-        filters = client.load_search(SAVED_SEARCH_NAME)
+        loaded = client.load_search_or_default(SAVED_SEARCH_NAME, 'Default Automation')
+        filters = loaded[1] if loaded and loaded[0] == SAVED_SEARCH_NAME else None
         if not filters:
-            # Try to fallback to "Default Automation" if the specified search doesn't exist
+            # Fall back to "Default Automation" if the specified search doesn't exist
             print(f"⚠️  Saved search '{SAVED_SEARCH_NAME}' not found!")
             print("💡 Attempting to use 'Default Automation' as fallback...")
-            fallback_filters = client.load_search('Default Automation')
-            
+            fallback_filters = loaded[1] if loaded else None
+
             if fallback_filters:
                 print(f"✅ Using 'Default Automation' filters as fallback")
                 filters = fallback_filters
@@ -131,85 +156,177 @@ def main():
         
         # Sync new announcements
         print("📥 Syncing new announcements from API...")
-        all_fetched_announcements = []
-        
-        # Fetch announcements for the date range
-        # Note: API returns by year, so we need to fetch the year and filter by date
-        for year in range(int(start_date.strftime('%Y')), int(end_date.strftime('%Y')) + 1):
+
+        # Incremental sync: the API only serves whole years, so the fetch
+        # stays per-year, but a per-year watermark of the highest
+        # announcement number already examined lets every later stage skip
+        # rows previous runs have seen. --full-sync (or FULL_SYNC=1)
+        # ignores the watermark for manual reconciliation.
+        full_sync = '--full-sync' in sys.argv or os.environ.get('FULL_SYNC') == '1'
+        if full_sync:
+            print("ℹ️  Full sync requested: ignoring incremental watermarks")
+
+        # autocommit connection with explicit BEGIN/COMMIT around the batch
+        # below; the pragmas match the cache layer's own connections so this
+        # script's raw handle doesn't pay the two-fsync rollback-journal
+        # barrier per commit (WAL + synchronous=NORMAL) and the Streamlit
+        # app can keep reading while the batch lands
+        conn_db = sqlite3.connect(client.db_path, isolation_level=None)
+        cursor = conn_db.cursor()
+        cursor.executescript(
+            "PRAGMA journal_mode=WAL;"
+            "PRAGMA synchronous=NORMAL;"
+            "PRAGMA temp_store=MEMORY;"
+            "PRAGMA busy_timeout=5000;"
+        )
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS sync_state (
+                kind TEXT PRIMARY KEY,
+                last_seen INTEGER
+            )
+        """)
+
+        years = [
+            str(y)
+            for y in range(int(start_date.strftime('%Y')), int(end_date.strftime('%Y')) + 1)
+        ]
+        last_seen = {}
+        for year in years:
+            row = cursor.execute(
+                "SELECT last_seen FROM sync_state WHERE kind = ?",
+                (f"announcements:{year}",)
+            ).fetchone()
+            last_seen[year] = row[0] if (row and not full_sync) else 0
+
+        # Filter by date range and get only new ones. DD/MM/YYYY is
+        # positional, so fixed-offset slices build the sortable YYYY-MM-DD
+        # form without split() allocating a list per row.
+        start_comparable = (
+            f"{start_date_str[6:10]}-{start_date_str[3:5]}-{start_date_str[0:2]}"
+        )
+        end_comparable = (
+            f"{end_date_str[6:10]}-{end_date_str[3:5]}-{end_date_str[0:2]}"
+        )
+
+        new_announcements = []
+        announcements_fetched = 0
+
+        # One SELECT feeds a set so the processed check is a dict-speed
+        # membership test here and in the deal loop below, instead of a
+        # query per announcement
+        processed = client.get_processed_announcements()
+
+        # Collect the in-range candidates first, then hit SQLite once for
+        # the whole batch instead of a connect/SELECT/INSERT/commit/close
+        # cycle per announcement (one fsync for the day, not N)
+        max_seen = dict(last_seen)
+        candidates = []
+
+        # Fetch and filter one year at a time: the API returns whole
+        # years, so consuming each payload before requesting the next
+        # keeps only the in-range rows resident instead of every year's
+        # full dump at once
+        for fetch_year in years:
             try:
-                year_announcements = client.client.get_announcement_info(ano=str(year))
+                year_announcements = client.client.get_announcement_info(ano=fetch_year)
                 if not isinstance(year_announcements, list):
                     year_announcements = [year_announcements] if year_announcements else []
-                all_fetched_announcements.extend(year_announcements)
             except Exception as e:
-                print(f"⚠️  Error fetching year {year}: {e}")
-        
-        # Filter by date range and get only new ones
-        def convert_date(date_str):
-            """Convert DD/MM/YYYY to YYYY-MM-DD"""
-            if not date_str:
-                return None
-            parts = date_str.split('/')
-            if len(parts) != 3:
-                return None
-            return f"{parts[2]}-{parts[1]}-{parts[0]}"
-        
-        start_comparable = convert_date(start_date_str)
-        end_comparable = convert_date(end_date_str)
-        
-        new_announcements = []
-        announcements_fetched = len(all_fetched_announcements)
-        
-        for announcement in all_fetched_announcements:
-            pub_date = announcement.get('dataPublicacao', '')
-            if not pub_date:
+                print(f"⚠️  Error fetching year {fetch_year}: {e}")
                 continue
-            
-            pub_comparable = convert_date(pub_date)
-            if not pub_comparable:
-                continue
-            
-            # Check if within date range
-            if start_comparable <= pub_comparable <= end_comparable:
+
+            announcements_fetched += len(year_announcements)
+
+            for announcement in year_announcements:
+                pub_date = announcement.get('dataPublicacao', '')
+                if len(pub_date) != 10:
+                    continue
+
+                pub_comparable = f"{pub_date[6:10]}-{pub_date[3:5]}-{pub_date[0:2]}"
+
+                # Rows published after the window stay out of the watermark so
+                # tomorrow's run still examines them
+                if pub_comparable > end_comparable:
+                    continue
+
                 n_anuncio = announcement.get('nAnuncio')
                 if not n_anuncio:
                     continue
-                
-                # Check if already in cache
-                if not client.is_announcement_processed(n_anuncio):
-                    # Store in cache if not already there
-                    try:
-                        # Check if exists in announcements table
-                        import sqlite3
-                        import json
-                        conn_db = sqlite3.connect(client.db_path)
-                        cursor = conn_db.cursor()
-                        cursor.execute(
-                            "SELECT n_anuncio FROM announcements WHERE n_anuncio = ?",
-                            (n_anuncio,)
-                        )
-                        if not cursor.fetchone():
-                            # Store new announcement
-                            cursor.execute("""
-                                INSERT OR REPLACE INTO announcements 
-                                (n_anuncio, data_publicacao, ano, tipo_anuncio, nif_entidade, 
-                                 raw_data, last_updated)
-                                VALUES (?, ?, ?, ?, ?, ?, ?)
-                            """, (
-                                n_anuncio,
-                                pub_date,
-                                announcement.get('Ano'),
-                                announcement.get('TipoAnuncio'),
-                                announcement.get('nifEntidade'),
-                                json.dumps(announcement),
-                                datetime.now().isoformat()
-                            ))
-                            conn_db.commit()
-                        conn_db.close()
-                    except Exception as e:
-                        print(f"⚠️  Error storing announcement {n_anuncio}: {e}")
-                    
+
+                year = pub_comparable[:4]
+                num = _announcement_number(n_anuncio)
+                if num > max_seen.get(year, 0):
+                    max_seen[year] = num
+
+                # Already examined by a previous run
+                if num and num <= last_seen.get(year, 0):
+                    continue
+
+                # Check if within date range
+                if pub_comparable >= start_comparable and n_anuncio not in processed:
+                    candidates.append((announcement, n_anuncio, pub_comparable))
                     new_announcements.append(announcement)
+
+            # Drop the year's payload before fetching the next one
+            del year_announcements
+
+        try:
+            try:
+                # Which candidates are already cached, in chunked
+                # IN-list queries rather than one SELECT per row
+                existing = set()
+                ids = [n_anuncio for _, n_anuncio, _ in candidates]
+                for i in range(0, len(ids), 500):
+                    chunk = ids[i:i + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    cursor.execute(
+                        f"SELECT n_anuncio FROM announcements "
+                        f"WHERE n_anuncio IN ({placeholders})",
+                        chunk
+                    )
+                    existing.update(row[0] for row in cursor.fetchall())
+
+                new_rows = [
+                    (
+                        n_anuncio,
+                        announcement.get('dataPublicacao'),
+                        announcement.get('Ano'),
+                        announcement.get('TipoAnuncio'),
+                        announcement.get('nifEntidade'),
+                        pub_comparable,
+                        _json_dumps(announcement),
+                        now_iso
+                    )
+                    for announcement, n_anuncio, pub_comparable in candidates
+                    if n_anuncio not in existing
+                ]
+
+                # Single transaction (and single commit) for the batch;
+                # the watermarks only advance if the same transaction
+                # commits, so a failed insert is retried next run
+                cursor.execute("BEGIN")
+                try:
+                    cursor.executemany("""
+                        INSERT OR IGNORE INTO announcements
+                        (n_anuncio, data_publicacao, ano, tipo_anuncio, nif_entidade,
+                         data_publicacao_sortable, raw_data, last_updated)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    """, new_rows)
+                    cursor.executemany(
+                        "INSERT OR REPLACE INTO sync_state (kind, last_seen) VALUES (?, ?)",
+                        [
+                            (f"announcements:{year}", num)
+                            for year, num in max_seen.items() if num
+                        ]
+                    )
+                    cursor.execute("COMMIT")
+                except Exception:
+                    cursor.execute("ROLLBACK")
+                    raise
+            except Exception as e:
+                print(f"⚠️  Error storing announcements: {e}")
+        finally:
+            conn_db.close()
         
         print(f"✅ Fetched {announcements_fetched} announcements from API")
         print(f"✅ Found {len(new_announcements)} new announcements in date range\n")
@@ -233,32 +350,46 @@ def main():
                 hubspot_token = None
             
             if hubspot_token:
-                for i, announcement in enumerate(filtered_announcements, 1):
+                to_process = [
+                    a for a in filtered_announcements
+                    if a.get('nAnuncio', 'unknown') not in processed
+                ]
+                skipped = len(filtered_announcements) - len(to_process)
+                if skipped:
+                    print(f"⏭️  {skipped} already processed, skipping")
+
+                # Batch endpoints: one IN search per 100 numbers finds the
+                # existing deals, then one batch POST per 100 creates the
+                # rest — ceil(N/100) round-trips each instead of N
+                existing_deals = check_deals_exist(
+                    [a.get('nAnuncio', 'unknown') for a in to_process],
+                    hubspot_token
+                )
+
+                to_create = []
+                for announcement in to_process:
                     n_anuncio = announcement.get('nAnuncio', 'unknown')
-                    print(f"  [{i}/{len(filtered_announcements)}] Processing: {n_anuncio}...", end=" ")
-                    
-                    # Check if already processed
-                    if client.is_announcement_processed(n_anuncio):
-                        print("⏭️  Already processed, skipping")
-                        continue
-                    
-                    # Check if deal already exists in HubSpot
-                    existing_deal_id = check_deal_exists(n_anuncio, hubspot_token)
-                    if existing_deal_id:
-                        print(f"✓ Deal already exists (ID: {existing_deal_id})")
+                    deal_id = existing_deals.get(n_anuncio)
+                    if deal_id:
+                        print(f"  {n_anuncio}: ✓ Deal already exists (ID: {deal_id})")
                         client.mark_announcement_processed(
                             n_anuncio,
-                            hubspot_deal_id=existing_deal_id,
+                            hubspot_deal_id=deal_id,
                             saved_search_name=SAVED_SEARCH_NAME
                         )
-                        continue
-                    
-                    # Create new deal
-                    result = create_deal_from_announcement(announcement, hubspot_token)
-                    
-                    if result and result.get('id'):
-                        deal_id = result['id']
-                        print(f"✓ Deal created (ID: {deal_id})")
+                        processed.add(n_anuncio)
+                    else:
+                        to_create.append(announcement)
+
+                created_deals = (
+                    create_deals_from_announcements(to_create, hubspot_token)
+                    if to_create else {}
+                )
+                for announcement in to_create:
+                    n_anuncio = announcement.get('nAnuncio', 'unknown')
+                    deal_id = created_deals.get(n_anuncio)
+                    if deal_id:
+                        print(f"  {n_anuncio}: ✓ Deal created (ID: {deal_id})")
                         deals_created += 1
                         client.mark_announcement_processed(
                             n_anuncio,
@@ -266,17 +397,15 @@ def main():
                             saved_search_name=SAVED_SEARCH_NAME
                         )
                     else:
-                        print("✗ Failed to create deal")
+                        print(f"  {n_anuncio}: ✗ Failed to create deal")
                         deals_failed += 1
                         # Still mark as processed to avoid retrying failed ones indefinitely
                         client.mark_announcement_processed(
                             n_anuncio,
                             saved_search_name=SAVED_SEARCH_NAME
                         )
-                    
-                    # Rate limiting - wait between requests
-                    time.sleep(0.3)
-                
+                    processed.add(n_anuncio)
+
                 print(f"\n✅ Deal creation complete: {deals_created} created, {deals_failed} failed")
             else:
                 print("⚠️  HubSpot token not available, skipping deal creation")
@@ -329,6 +458,5 @@ def main():
 
 
 if __name__ == "__main__":
-    import os
     main()
 
